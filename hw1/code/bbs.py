@@ -1,42 +1,185 @@
+from math import log2
+from multiprocessing import Pool
+from time import perf_counter
+
+#optional faster big int backend
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
 # 512-bit primes
 p = 6070186730910479310918815191840163587634827602441835781625018423574917227762047548183164111199826067360243865009867508398917120094583722287922451025975767
 q = 5340312989465584099871463955436845940135320986603689391470576059268871866982316459236849963576848007087188105130926608734906024678241674028940333669236459
 
 M = p * q
 
+P_INV_Q  = pow(p, -1, q)            #for CRT recombination
+MAX_BITS = int(log2(log2(M)))       #number of lsbs that can be taken from each squaring
+BACKENDS = ("gmpy2", "python") if gmpy2 is not None else ("python",)
+
+
+#x^(2^k) mod M without k sequential squarings
+#exponent is reduced modulo (p-1) and (q-1) separately (together that is modulo lcm(p-1, q-1)) and the results are recombined with CRT
+def jump(x: int, k: int) -> int:
+    xp = x % p
+    xq = x % q
+    if xp != 0:
+        xp = pow(xp, pow(2, k, p - 1), p)
+    if xq != 0:
+        xq = pow(xq, pow(2, k, q - 1), q)
+    return xp + p * ((xq - xp) * P_INV_Q % q)
+
 
 class BBSState:
-    def __init__(self, seed: int):
+    def __init__(self, seed: int, bits: int = 1, backend: str = BACKENDS[0]):
+        if not 1 <= bits <= MAX_BITS:
+            raise ValueError(f"bits must be between 1 and {MAX_BITS}")
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend '{backend}', available: {', '.join(BACKENDS)}")
+
         seed **= 100
-        self.state = (seed * seed) % M
+        self.bits    = bits                         #lsbs taken from each squaring
+        self.mask    = (1 << bits) - 1
+        self.modulus = gmpy2.mpz(M) if backend == "gmpy2" else M
+        self.start   = (seed * seed) % M            #state before the first squaring
+        self.state   = self.start
+        self.pending = b""                          #already generated bytes which were not returned yet
+        self.seek(0)
+
+    def seek(self, step: int):
+        self.state   = jump(self.start, step) % self.modulus     #next squaring is squaring number `step` (% converts to the backend type)
+        self.step    = step                                     #number of squarings done
+        self.pending = b""
+
+    #json serializable internals for checkpoints, steps and pending bytes only make sense with the same number of bits
+    def getState(self) -> dict:
+        return {"state": int(self.state), "step": self.step, "pending": self.pending.hex(), "bits": self.bits}
+
+    def setState(self, state: dict):
+        if state.get("bits") != self.bits:
+            raise ValueError(f"state was saved with {state.get('bits', 'unknown')} bit(s) per squaring, not {self.bits}")
+        self.state   = state["state"] % self.modulus
+        self.step    = state["step"]
+        self.pending = bytes.fromhex(state["pending"])
 
     def generateBit(self):
-        self.state = (self.state * self.state) % M  #skip first state
-        return self.state & 1                       #get lsb
+        self.state = (self.state * self.state) % self.modulus   #skip first state
+        self.step += 1
+        return self.state & 1                                   #get lsb
+
+    def generateBits(self):
+        self.state = (self.state * self.state) % self.modulus
+        self.step += 1
+        return int(self.state & self.mask)                      #get `bits` lsbs
+
+    def generateBytes(self, length: int) -> bytearray:
+        bits    = self.bits
+        mask    = self.mask
+        modulus = self.modulus
+        state   = self.state
+        result  = bytearray(self.pending[:length])
+        pos     = len(result)
+
+        start        = pos
+        self.pending = self.pending[length:]
+        result.extend(bytes(length - pos + bits))   #preallocate (+ space for the last partial group)
+
+        #8 squarings give exactly `bits` bytes; first generated bit is MSB
+        while pos < length:
+            word = 0
+            for j in range(0, 8):
+                state = (state * state) % modulus
+                word  = (word << bits) | int(state & mask)
+
+            result[pos:pos + bits] = word.to_bytes(bits, "big")
+            pos += bits
 
+        self.step   += (pos - start) // bits * 8
+        self.state   = state
+        self.pending = bytes(result[length:pos]) + self.pending
+        del result[length:]
+        return result
 
-def generate_bytes(seed: int, length: int) -> bytes:
-    generator = BBSState(seed)
-    result    = bytearray()
 
-    for i in range(0, length):
-        byte = 0
-        #create byte from subsequent generator calls
-        for j in range(0, 8):
-            byte += generator.generateBit() << (7 - j % 8)  #first bit from generator is MSB
+def generate_shard(seed: int, offset: int, length: int, bits: int = 1, backend: str = BACKENDS[0]) -> bytes:
+    generator = BBSState(seed, bits, backend)
+    generator.seek(offset * 8 // bits)      #offset has to be a multiple of `bits`
+    return bytes(generator.generateBytes(length))
 
-        result.append(byte)
 
-    return bytes(result)
+def shard_worker(args):
+    return generate_shard(*args)
+
+
+#[offset, offset + length) split into a few shards per process to even out the load, aligned to `bits` bytes; -(-x//y) == ceil
+def shards(seed: int, offset: int, length: int, processes: int, bits: int, backend: str):
+    shard_size = -(-length // (processes * 4 * bits)) * bits
+    return [(seed, offset + pos, min(shard_size, length - pos), bits, backend) for pos in range(0, length, shard_size)]
+
+
+#processes > 1 splits the output into shards which are generated independently (every shard seeks to its own offset)
+def generate_bytes(seed: int, length: int, processes: int = 1, bits: int = 1, backend: str = BACKENDS[0]) -> bytes:
+    if processes <= 1 or length < processes * bits:
+        return generate_shard(seed, 0, length, bits, backend)
+
+    with Pool(processes) as pool:
+        return b"".join(pool.map(shard_worker, shards(seed, 0, length, processes, bits, backend)))
+
+
+#same output as generate_bytes, split into chunks of chunk_size bytes (the last one may be shorter)
+#continues from `generator` when it is given (resumed runs), it is kept up to date after every chunk
+def iter_chunks(seed: int, length: int, chunk_size: int = 1 << 16, processes: int = 1, bits: int = 1, backend: str = BACKENDS[0], generator: BBSState = None):
+    if generator is None:
+        generator = BBSState(seed, bits, backend)
+
+    if processes <= 1:
+        for pos in range(0, length, chunk_size):
+            yield bytes(generator.generateBytes(min(chunk_size, length - pos)))
+        return
+
+    #bytes left from the last squarings first, everything after them starts at a squaring boundary
+    pos = min(len(generator.pending), length)
+    if pos:
+        yield bytes(generator.generateBytes(pos))
+
+    offset     = generator.step * bits // 8      #byte offset of the next squaring
+    chunk_size = -(-chunk_size // bits) * bits   #chunks have to start at a squaring boundary
+    with Pool(processes) as pool:
+        for pos in range(pos, length, chunk_size):
+            size   = min(chunk_size, length - pos)
+            chunk  = b"".join(pool.map(shard_worker, shards(seed, offset, size, processes, bits, backend)))
+            offset += size
+            generator.seek(offset * 8 // bits)
+            yield chunk
+
+
+#bytes/sec of every backend with 1 bit, a few middle values and the maximum number of bits per squaring
+def benchmark(seed: int = 492875, length: int = 20000):
+    for backend in BACKENDS:
+        for bits in sorted({1, 2, 4, MAX_BITS}):
+            start = perf_counter()
+            generate_bytes(seed, length, bits=bits, backend=backend)
+            elapsed = perf_counter() - start
+            print(f"{backend:>6} {bits:2} bit(s)/squaring: {length / elapsed:12.0f} B/s")
 
 
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) != 4:
-        print(f"USAGE: python {sys.argv[0]} <OUTPUT FILE> <SEED> <OUTPUT BYTES>")
-    out_file = sys.argv[1]
-    seed = int(sys.argv[2])
-    length = int(sys.argv[3])
-    with open(out_file, "wb") as out_file:
-        out_file.write(generate_bytes(seed, length))
+    import stream
+
+    parser = stream.parser("Blum Blum Shub generator")
+    parser.add_argument("-j", "--processes", type=int, default=1, help="number of worker processes")
+    parser.add_argument("-b", "--bits", type=int, default=1, help=f"lsbs taken from each squaring (1-{MAX_BITS})")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKENDS[0])
+    parser.add_argument("--benchmark", action="store_true", help="print bytes/sec of every mode and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        stream.check(parser, args)
+        generator = BBSState(args.seed, args.bits, args.backend)
+        done      = stream.resume(args, generator)
+        chunks    = iter_chunks(args.seed, args.length - done, args.chunk_size, args.processes, args.bits, args.backend, generator)
+        stream.write(chunks, args, generator, done)
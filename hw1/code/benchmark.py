@@ -0,0 +1,135 @@
+#throughput and quality of the generators across output sizes, results are saved as json to compare different commits
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from statistics import mean, stdev
+from time import perf_counter
+
+import nist
+from bbs import BACKENDS as BBS_BACKENDS
+
+
+#name: (module, function, keyword arguments, largest output size worth running)
+#upper case string arguments name constants of the module
+ENGINES = {
+    "bbs":           ("bbs",  "generate_bytes",           {},                 1 << 15),
+    "bbs-maxbits":   ("bbs",  "generate_bytes",           {"bits": "MAX_BITS"}, 1 << 17),
+    "bbs-sharded":   ("bbs",  "generate_bytes",           {"processes": os.cpu_count()}, 1 << 15),
+    **{f"bbs-{backend}": ("bbs", "generate_bytes",        {"backend": backend}, 1 << 15) for backend in BBS_BACKENDS},
+    "lcg":           ("lcg",  "generate_bytes",           {},                 1 << 26),
+    "x931":          ("x931", "generate_bytes",           {},                 1 << 22),
+    "x931-original": ("x931", "generate_bytes_reference", {},                 1 << 20),
+}
+
+SIZES = [1 << 12, 1 << 15, 1 << 18, 1 << 20, 1 << 22]
+
+#two sided 95% t quantiles by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+        15: 2.131, 20: 2.086, 30: 2.042}
+
+
+def confidence(values):
+    if len(values) < 2:
+        return mean(values), 0.0
+    df = len(values) - 1
+    t  = T_95[max(k for k in T_95 if k <= df)] if df <= 30 else 1.96
+    return mean(values), t * stdev(values) / len(values) ** 0.5
+
+
+#runs in a fresh process so the peak rss belongs to this run only
+def single_run(engine: str, seed: int, size: int):
+    module, function, kwargs, _ = ENGINES[engine]
+    module = __import__(module)
+    kwargs = {key: getattr(module, value) if isinstance(value, str) and value.isupper() else value for key, value in kwargs.items()}
+
+    start  = perf_counter()
+    output = getattr(module, function)(seed, size, **kwargs)
+    wall   = perf_counter() - start
+    rss    = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))     #KiB on linux, sharded engines have children
+
+    return wall, rss, nist.pass_rate(nist.test_bytes(output))
+
+
+def benchmark(engines, sizes, repeats: int = 3, seed: int = 492875, verbose: bool = True):
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for engine in engines:
+        for size in sizes:
+            if size > ENGINES[engine][3]:
+                continue
+            runs = []
+            for i in range(repeats):
+                with ProcessPoolExecutor(1, mp_context=context) as pool:   #not daemonic, sharded engines start their own pool
+                    runs.append(pool.submit(single_run, engine, seed + i, size).result())    #different seed for every repeat
+
+            wall, wall_ci = confidence([run[0] for run in runs])
+            rate, rate_ci = confidence([run[2] for run in runs])
+            result = {
+                "engine":         engine,
+                "size":           size,
+                "repeats":        repeats,
+                "wall":           wall,
+                "wall_ci":        wall_ci,
+                "bytes_per_sec":  size / wall,
+                "ns_per_bit":     wall / (size * 8) * 1e9,
+                "peak_rss_kib":   max(run[1] for run in runs),
+                "pass_rate":      rate,
+                "pass_rate_ci":   rate_ci,
+            }
+            results.append(result)
+            if verbose:
+                print(f"{engine:>13} {size:>9} B: {wall:9.4f} +- {wall_ci:7.4f} s {result['bytes_per_sec']:13.0f} B/s "
+                      f"{result['ns_per_bit']:9.1f} ns/bit {result['peak_rss_kib']:8} KiB rss  pass {rate * 100:5.1f} +- {rate_ci * 100:4.1f} %")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()     #commit of the benchmarked code, not of the caller
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+#bytes/sec of matching (engine, size) pairs relative to an older result file
+def compare(results, old_file: str):
+    with open(old_file) as file:
+        old = json.load(file)
+    print(f"Compared to {old_file} (commit {old.get('commit')}):")
+    old_results = {(result["engine"], result["size"]): result for result in old["results"]}
+    for result in results:
+        previous = old_results.get((result["engine"], result["size"]))
+        if previous is not None:
+            print(f"{result['engine']:>13} {result['size']:>9} B: {result['bytes_per_sec'] / previous['bytes_per_sec']:6.2f}x throughput, "
+                  f"pass rate {previous['pass_rate'] * 100:5.1f} % -> {result['pass_rate'] * 100:5.1f} %")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generator throughput and quality benchmark")
+    parser.add_argument("-e", "--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("-s", "--sizes", nargs="+", type=int, default=SIZES, help="output sizes in bytes")
+    parser.add_argument("-r", "--repeats", type=int, default=3)
+    parser.add_argument("-o", "--out-file", default="benchmark.json", help="json file with the results")
+    parser.add_argument("-c", "--compare", help="json file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = benchmark(args.engines, args.sizes, args.repeats)
+    with open(args.out_file, "w") as out_file:
+        json.dump({
+            "commit":  git_commit(),
+            "date":    datetime.now().isoformat(timespec="seconds"),
+            "python":  sys.version.split()[0],
+            "machine": platform.platform(),
+            "results": results,
+        }, out_file, indent=4)
+
+    if args.compare:
+        compare(results, args.compare)
@@ -1,7 +1,38 @@
+import numpy as np
+
+
 a = 1664525
 c = 1013904223
 m = 2**32
 
+BLOCK = 1 << 20     #number of states generated by one vectorized step
+
+
+#(a^n, c*(a^n - 1)/(a - 1)) mod m, i.e. the lcg step composed n times, by square and multiply
+def compose(n: int):
+    mul, add           = 1, 0       #identity
+    step_mul, step_add = a, c       #step composed 2^i times
+    while n > 0:
+        if n & 1:
+            mul, add = (step_mul * mul) % m, (step_mul * add + step_add) % m
+        step_mul, step_add = (step_mul * step_mul) % m, (step_mul * step_add + step_add) % m
+        n >>= 1
+    return mul, add
+
+
+#multipliers and increments of the step composed 1..n times as uint32 arrays (uint32 arithmetic wraps modulo m on its own)
+def compose_table(n: int):
+    mul = np.array([a], dtype=np.uint32)
+    add = np.array([c], dtype=np.uint32)
+    while len(mul) < n:
+        #step composed k + j times is step composed j times applied after step composed k times
+        mul = np.concatenate((mul, mul * mul[-1]))
+        add = np.concatenate((add, mul[:len(add)] * add[-1] + add))
+    return mul[:n], add[:n]
+
+
+MUL_TABLE, ADD_TABLE = compose_table(BLOCK)
+
 
 class LCGState:
     def __init__(self, seed):
@@ -11,25 +42,48 @@ class LCGState:
         self.state = (a * self.state + c) % m   #skip first state
         return self.state
 
+    #json serializable internals for checkpoints
+    def getState(self) -> dict:
+        return {"state": self.state}
+
+    def setState(self, state: dict):
+        self.state = state["state"]
+
+    def skip(self, n: int):
+        mul, add   = compose(n)
+        self.state = (mul * self.state + add) % m
+
+    #next `n` states as uint32 array
+    def block(self, n: int):
+        result = np.empty(n, dtype=np.uint32)
+        for pos in range(0, n, BLOCK):
+            count = min(BLOCK, n - pos)
+            np.multiply(MUL_TABLE[:count], np.uint32(self.state), out=result[pos:pos + count])
+            result[pos:pos + count] += ADD_TABLE[:count]
+            self.state = int(result[pos + count - 1])
+        return result
+
 
 def generate_bytes(seed: int, length: int) -> bytes:
     generator = LCGState(seed)
-    result    = bytearray()
+    return ((generator.block(length) >> 8) & 0xff).astype(np.uint8).tobytes()  #get 2nd byte
 
-    for i in range(0, length): 
-        result.append((generator.next() & 0x0000ff00) >> 8) #get 2nd byte
 
-    return bytes(result)
+#same output as generate_bytes, split into chunks of chunk_size bytes (the last one may be shorter)
+#continues from `generator` when it is given (resumed runs)
+def iter_chunks(seed: int, length: int, chunk_size: int = BLOCK, generator: LCGState = None):
+    if generator is None:
+        generator = LCGState(seed)
+    for pos in range(0, length, chunk_size):
+        yield ((generator.block(min(chunk_size, length - pos)) >> 8) & 0xff).astype(np.uint8).tobytes()
 
 
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) != 4:
-        print(f"USAGE: python {sys.argv[0]} <OUTPUT FILE> <SEED> <OUTPUT BYTES>")
-    out_file = sys.argv[1]
-    seed = int(sys.argv[2])
-    length = int(sys.argv[3])
-    with open(out_file, "wb") as out_file:
-        out_file.write(generate_bytes(seed, length))
+    import stream
 
+    parser    = stream.parser("Linear congruential generator")
+    args      = parser.parse_args()
+    stream.check(parser, args)
+    generator = LCGState(args.seed)
+    done      = stream.resume(args, generator)
+    stream.write(iter_chunks(args.seed, args.length - done, args.chunk_size, generator), args, generator, done)
@@ -0,0 +1,72 @@
+import numpy as np
+from multiprocessing import Pool
+from time import perf_counter
+
+import lcg
+
+
+BATCH = 1 << 22     #seeds evaluated by one vectorized call
+
+
+#all seeds from [start, stop) whose first len(prefix) outputs match the prefix
+def search_range(args):
+    start, stop, prefix = args
+    seeds  = np.arange(start, stop, dtype=np.uint64).astype(np.uint32)
+    states = seeds
+    for byte in prefix:
+        states = states * np.uint32(lcg.a) + np.uint32(lcg.c)  #uint32 wraps modulo m
+        keep   = ((states >> 8) & 0xff) == byte                 #filter on the observed 2nd byte
+        seeds  = seeds[keep]
+        states = states[keep]
+        if len(seeds) == 0:
+            break
+    return stop - start, seeds
+
+
+#bits: size of the searched seed space (seeds are reduced modulo 2^32 by LCGState, so 32 covers everything)
+def recover_seeds(prefix: bytes, processes: int = 1, bits: int = 32, steps: int = 8, verbose: bool = True):
+    space  = 1 << bits
+    ranges = [(start, min(start + BATCH, space), prefix[:steps]) for start in range(0, space, BATCH)]
+    found  = []
+    done   = 0
+
+    begin = perf_counter()
+    with Pool(processes) as pool:
+        for count, seeds in pool.imap_unordered(search_range, ranges):
+            found.extend(int(seed) for seed in seeds)
+            done += count
+            if verbose:
+                elapsed = perf_counter() - begin
+                print(f"\r{done / space * 100:6.2f}% {done / elapsed:14.0f} seeds/s {len(found):10} candidates", end="", flush=True)
+    if verbose:
+        print("")
+
+    #check the remaining observed bytes with the reference generator
+    return sorted(seed for seed in found if lcg.generate_bytes(seed, len(prefix)) == prefix)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Recover every LCG seed consistent with an observed output prefix")
+    parser.add_argument("in_file", help="file starting with bytes produced by lcg.generate_bytes")
+    parser.add_argument("-n", "--prefix", type=int, default=16, help="number of observed bytes to use")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count())
+    parser.add_argument("-b", "--bits", type=int, default=32, help="search seeds in [0, 2^bits)")
+    parser.add_argument("-o", "--out-file", help="write all consistent seeds to this file")
+    args = parser.parse_args()
+
+    with open(args.in_file, "rb") as in_file:
+        prefix = in_file.read(args.prefix)
+
+    seeds = recover_seeds(prefix, args.processes, args.bits)
+    print(f"{len(seeds)} consistent seed(s)")
+
+    #2nd byte of the output depends only on the low 16 bits of the state, so seeds come in classes sharing the low 16 bits
+    for low in sorted({seed & 0xffff for seed in seeds}):
+        print(f"seed & 0xffff == 0x{low:04x}")
+
+    if args.out_file:
+        with open(args.out_file, "w") as out_file:
+            out_file.write("\n".join(str(seed) for seed in seeds))
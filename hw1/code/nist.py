@@ -0,0 +1,355 @@
+#core tests of NIST SP 800-22 rev. 1a (https://csrc.nist.gov/publications/detail/sp/800-22/rev-1a/final)
+#every test is an accumulator which is fed the sequence chunk by chunk as an uint8 array of bits, so the input can be longer than memory
+import numpy as np
+from math import erfc, exp, floor, lgamma, log, log2, sqrt
+
+
+ALPHA      = 0.01
+CHUNK_SIZE = 1 << 22    #bytes read from the input at once
+DFT_BITS   = 1 << 24    #the spectral test needs the whole sequence in memory, it uses at most this many bits
+
+
+#regularized upper incomplete gamma function Q(a, x), series and continued fraction from Numerical Recipes
+def igamc(a: float, x: float) -> float:
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        term  = 1.0 / a
+        total = term
+        n     = a
+        while abs(term) > abs(total) * 1e-15:
+            n     += 1
+            term  *= x / n
+            total += term
+        return max(0.0, 1.0 - total * exp(-x + a * log(x) - lgamma(a)))
+
+    b = x + 1 - a
+    c = 1e300
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d  = an * d + b
+        d  = 1e-300 if abs(d) < 1e-300 else d
+        c  = b + an / c
+        c  = 1e-300 if abs(c) < 1e-300 else c
+        d  = 1 / d
+        h *= d * c
+        if abs(d * c - 1) < 1e-15:
+            break
+    return exp(-x + a * log(x) - lgamma(a)) * h
+
+
+def normal_cdf(x):
+    return 0.5 * np.vectorize(erfc)(-np.asarray(x, dtype=np.float64) / sqrt(2))
+
+
+class Frequency:
+    name = "Freq. test"
+
+    def __init__(self):
+        self.n    = 0
+        self.ones = 0
+
+    def update(self, bits):
+        self.n    += len(bits)
+        self.ones += int(np.count_nonzero(bits))
+
+    def result(self):
+        s_obs = abs(2 * self.ones - self.n) / sqrt(self.n)
+        return [erfc(s_obs / sqrt(2))]
+
+
+class BlockFrequency:
+    name = "Block test"
+
+    def __init__(self, block_size: int = 128):
+        self.M      = block_size
+        self.rest   = np.zeros(0, dtype=np.uint8)   #bits of the last incomplete block
+        self.blocks = 0
+        self.chi    = 0.0
+
+    def update(self, bits):
+        bits   = np.concatenate((self.rest, bits))
+        count  = len(bits) // self.M
+        ones   = bits[:count * self.M].reshape(count, self.M).sum(axis=1, dtype=np.int64)
+        pi     = ones / self.M
+        self.rest    = bits[count * self.M:]
+        self.blocks += count
+        self.chi    += float(np.sum((pi - 0.5) ** 2))
+
+    def result(self):
+        if self.blocks == 0:
+            return [float("nan")]
+        chi = 4 * self.M * self.chi
+        return [igamc(self.blocks / 2, chi / 2)]
+
+
+class Runs:
+    name = "Runs test"
+
+    def __init__(self):
+        self.n       = 0
+        self.ones    = 0
+        self.changes = 0
+        self.last    = None     #last bit of the previous chunk
+
+    def update(self, bits):
+        if len(bits) == 0:
+            return
+        self.n       += len(bits)
+        self.ones    += int(np.count_nonzero(bits))
+        self.changes += int(np.count_nonzero(bits[1:] != bits[:-1]))
+        if self.last is not None and self.last != bits[0]:
+            self.changes += 1
+        self.last = bits[-1]
+
+    def result(self):
+        pi = self.ones / self.n
+        if abs(pi - 0.5) >= 2 / sqrt(self.n):   #frequency prerequisite failed
+            return [0.0]
+        v_obs = self.changes + 1
+        return [erfc(abs(v_obs - 2 * self.n * pi * (1 - pi)) / (2 * sqrt(2 * self.n) * pi * (1 - pi)))]
+
+
+#leading ones (from the MSB), trailing ones and the longest run of ones of every byte
+RUN_BITS  = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+RUN_LEAD  = np.argmin(np.hstack((RUN_BITS, np.zeros((256, 1), dtype=np.uint8))), axis=1).astype(np.int16)
+RUN_TRAIL = RUN_LEAD[np.packbits(RUN_BITS[:, ::-1], axis=1).ravel()]
+RUN_INNER = np.array([max(len(run) for run in format(byte, "08b").split("0")) for byte in range(256)], dtype=np.int16)
+
+
+class LongestRun:
+    name = "Longest run"
+
+    #(block size, lowest class, highest class, class probabilities) by the sequence length
+    PARAMETERS = ((8,     1,  4, (0.21484375, 0.3671875, 0.23046875, 0.1875)),
+                  (128,   4,  9, (0.1174035788, 0.242955959, 0.249363483, 0.17517706, 0.102701071, 0.112398847)),
+                  (10000, 10, 16, (0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727)))
+
+    def __init__(self, length: int):
+        self.n = length
+        if length < 128:
+            self.M = None
+            return
+        self.M, self.low, self.high, self.pi = self.PARAMETERS[0 if length < 6272 else 1 if length < 750000 else 2]
+        self.rest   = np.zeros(0, dtype=np.uint8)
+        self.counts = np.zeros(len(self.pi), dtype=np.int64)
+
+    def update(self, bits):
+        if self.M is None:
+            return
+        if len(self.rest):
+            bits = np.concatenate((self.rest, bits))
+        count = len(bits) // self.M
+        self.rest = bits[count * self.M:].copy()
+        if count == 0:
+            return
+
+        #blocks are whole bytes (M is a multiple of 8), runs inside of a byte come from the byte tables and runs over
+        #byte boundaries are the ones ending in a byte plus the leading ones of the next byte
+        #ones ending in byte j reach back to the last byte p which is not all ones: trail[p] + 8 * (j - p), trail[p] - 8 * p
+        #decreases with p, so the last such byte is the running minimum (8 stands for "no such byte in the block")
+        blocks  = np.packbits(bits[:count * self.M]).reshape(count, self.M // 8)
+        column  = 8 * np.arange(blocks.shape[1], dtype=np.int16)
+        ending  = column + np.minimum.accumulate(np.where(blocks != 0xFF, np.take(RUN_TRAIL, blocks) - column, np.int16(8)), axis=1)
+        longest = np.maximum(np.take(RUN_INNER, blocks).max(axis=1), ending.max(axis=1))
+        if blocks.shape[1] > 1:
+            longest = np.maximum(longest, (ending[:, :-1] + np.take(RUN_LEAD, blocks[:, 1:])).max(axis=1))
+
+        classes = np.clip(longest, self.low, self.high) - self.low
+        self.counts += np.bincount(classes, minlength=len(self.pi))
+
+    def result(self):
+        if self.M is None:
+            return [float("nan")]
+        blocks   = self.counts.sum()
+        expected = blocks * np.array(self.pi)
+        chi      = float(np.sum((self.counts - expected) ** 2 / expected))
+        return [igamc((len(self.pi) - 1) / 2, chi / 2)]
+
+
+#walk of +-1 steps over the bits of every byte (MSB first): change of the sum, highest and lowest partial sum relative
+#to the sum after the byte
+CUSUM_WALK  = np.cumsum(2 * RUN_BITS.astype(np.int8) - 1, axis=1, dtype=np.int8)
+CUSUM_DELTA = CUSUM_WALK[:, -1]
+CUSUM_HIGH  = CUSUM_WALK.max(axis=1) - CUSUM_DELTA
+CUSUM_LOW   = CUSUM_WALK.min(axis=1) - CUSUM_DELTA
+
+
+class CumulativeSums:
+    name = "Cusum test"
+
+    def __init__(self):
+        self.n       = 0
+        self.total   = 0
+        self.maximum = 0    #over the partial sums S_0 = 0 .. S_n
+        self.minimum = 0
+
+    def update(self, bits):
+        whole = len(bits) - len(bits) % 8
+        if whole:
+            packed = np.packbits(bits[:whole])
+            sums   = np.cumsum(np.take(CUSUM_DELTA, packed), dtype=np.int32)     #after every byte, relative to the sum before
+            self.n      += whole
+            self.maximum = max(self.maximum, self.total + int((sums + np.take(CUSUM_HIGH, packed)).max()))
+            self.minimum = min(self.minimum, self.total + int((sums + np.take(CUSUM_LOW, packed)).min()))
+            self.total  += int(sums[-1])
+        if whole < len(bits):
+            sums = np.cumsum(2 * bits[whole:].view(np.int8) - 1, dtype=np.int32)     #relative to the sum before these bits
+            self.n      += len(bits) - whole
+            self.maximum = max(self.maximum, self.total + int(sums.max()))
+            self.minimum = min(self.minimum, self.total + int(sums.min()))
+            self.total  += int(sums[-1])
+
+    def p_value(self, z):
+        n  = self.n
+        k  = np.arange(floor((-n / z + 1) / 4), floor((n / z - 1) / 4) + 1)
+        s1 = np.sum(normal_cdf((4 * k + 1) * z / sqrt(n)) - normal_cdf((4 * k - 1) * z / sqrt(n)))
+        k  = np.arange(floor((-n / z - 3) / 4), floor((n / z - 1) / 4) + 1)
+        s2 = np.sum(normal_cdf((4 * k + 3) * z / sqrt(n)) - normal_cdf((4 * k + 1) * z / sqrt(n)))
+        return float(1 - s1 + s2)
+
+    def result(self):
+        forward  = max(self.maximum, -self.minimum)
+        backward = max(self.total - self.minimum, self.maximum - self.total)
+        return [self.p_value(max(forward, 1)), self.p_value(max(backward, 1))]
+
+
+class Spectral:
+    name = "DFT test"
+
+    def __init__(self, max_bits: int = DFT_BITS):
+        self.max_bits = max_bits
+        self.bits     = []
+        self.n        = 0
+
+    def update(self, bits):
+        if self.n < self.max_bits:
+            bits = bits[:self.max_bits - self.n]
+            self.bits.append(bits.copy())
+            self.n += len(bits)
+
+    def result(self):
+        x       = 2 * np.concatenate(self.bits).astype(np.float64) - 1
+        n       = len(x)
+        modulus = np.abs(np.fft.rfft(x)[:n // 2])
+        T       = sqrt(log(1 / 0.05) * n)
+        N0      = 0.95 * n / 2
+        N1      = np.count_nonzero(modulus < T)
+        d       = (N1 - N0) / sqrt(n * 0.95 * 0.05 / 4)
+        return [erfc(abs(d) / sqrt(2))]
+
+
+class Serial:
+    name = "Serial test"
+
+    def __init__(self, m: int):
+        if not 1 <= m <= 25:
+            raise ValueError("serial test pattern length has to be between 1 and 25")     #windows are read from 32 bit words
+        self.m      = m
+        self.step   = 4 if m <= 17 else 1               #m + step - 1 bit windows are counted at every step-th bit
+        self.head   = np.zeros(0, dtype=np.uint8)       #first m-1 bits, for the wrap around at the end
+        self.tail   = np.zeros(0, dtype=np.uint8)       #last m-1 bits of the previous chunk
+        self.counts = np.zeros(1 << m, dtype=np.int64)
+        self.wide   = np.zeros(1 << (m + self.step - 1), dtype=np.int64)
+        self.n      = 0
+
+    #counts of all the m-bit windows of bits, a wide window at bit step*i holds the m-bit windows at step*i .. step*i+step-1
+    #windows starting at bit 8j + offset are the 32 bit big endian word from byte j shifted by offset
+    def count(self, bits):
+        width  = self.m + self.step - 1
+        starts = (len(bits) - width) // self.step + 1 if len(bits) >= width else 0     #number of wide windows
+        if starts:
+            packed = np.concatenate((np.packbits(bits), np.zeros(3, dtype=np.uint8)))
+            words  = np.ndarray((len(packed) - 3,), dtype=">u4", buffer=packed, strides=(1,)).astype(np.uint32)
+            for offset in range(0, 8, self.step):
+                values = (words[:(starts - offset // self.step + 8 // self.step - 1) // (8 // self.step)] << np.uint32(offset)) >> np.uint32(32 - width)
+                self.wide += np.bincount(values, minlength=len(self.wide))
+        powers = 1 << np.arange(self.m - 1, -1, -1)
+        for start in range(self.step * starts, len(bits) - self.m + 1):    #less than step windows after the last wide one
+            self.counts[int(np.dot(bits[start:start + self.m], powers))] += 1
+
+    def update(self, bits):
+        if len(self.head) < self.m - 1:
+            self.head = np.concatenate((self.head, bits))[:self.m - 1]
+        self.n += len(bits)
+        bits    = np.concatenate((self.tail, bits))
+        self.count(bits)
+        self.tail = bits[len(bits) - self.m + 1:] if self.m > 1 else bits[:0]
+
+    def psi(self, counts):
+        return float(len(counts) / self.n * np.sum(counts.astype(np.float64) ** 2) - self.n)
+
+    def result(self):
+        self.count(np.concatenate((self.tail, self.head)))     #patterns wrapping around the end
+        self.tail = self.tail[:0]
+        for offset in range(self.step):
+            self.counts += self.wide.reshape(1 << offset, 1 << self.m, -1).sum(axis=(0, 2))
+        self.wide[:] = 0
+
+        #counts of shorter patterns are sums of the counts of their extensions
+        counts = [self.counts]
+        for i in range(2):
+            counts.append(counts[-1].reshape(-1, 2).sum(axis=1) if len(counts[-1]) > 1 else np.zeros(0))
+        psi    = [self.psi(c) if len(c) > 1 else 0.0 for c in counts]
+        delta1 = psi[0] - psi[1]
+        delta2 = psi[0] - 2 * psi[1] + psi[2]
+        return [igamc(2 ** (self.m - 2), delta1 / 2), igamc(2 ** (self.m - 3), delta2 / 2)]
+
+
+def battery(length: int, block_size: int = 128, serial_m: int = None, dft_bits: int = DFT_BITS):
+    if serial_m is None:
+        serial_m = max(3, min(16, int(log2(max(length, 2))) - 3))
+    return [Frequency(), BlockFrequency(block_size), Runs(), LongestRun(length), CumulativeSums(), Spectral(dft_bits), Serial(serial_m)]
+
+
+def run(chunks, length: int, **kwargs):
+    tests = battery(length, **kwargs)
+    for chunk in chunks:
+        bits = np.unpackbits(np.frombuffer(chunk, dtype=np.uint8))     #first bit of a byte is its MSB
+        for test in tests:
+            test.update(bits)
+    return [(test.name, test.result()) for test in tests]
+
+
+def test_bytes(data, **kwargs):
+    return run([data], len(data) * 8, **kwargs)
+
+
+#input is memory mapped and processed by chunks
+def test_file(path: str, chunk_size: int = CHUNK_SIZE, **kwargs):
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    return run((data[pos:pos + chunk_size] for pos in range(0, len(data), chunk_size)), len(data) * 8, **kwargs)
+
+
+#fraction of passed p-values
+def pass_rate(results, alpha: float = ALPHA):
+    p_values = [p for name, values in results for p in values if p == p]    #nan when the test is not applicable
+    return sum(p >= alpha for p in p_values) / len(p_values)
+
+
+def print_results(results, alpha: float = ALPHA):
+    for name, values in results:
+        for p in values:
+            if p != p:
+                print(f"{name:<12}- not applicable (sequence too short)")
+            elif p >= alpha:
+                print(f"{name:<12}- p = {p:.7f}... >= {alpha} -> sequence is random")
+            else:
+                print(f"{name:<12}- p = {p:.7f}... <  {alpha} -> sequence is non-random")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NIST SP 800-22 core statistical tests")
+    parser.add_argument("in_file", help="file with generator output")
+    parser.add_argument("-M", "--block-size", type=int, default=128, help="block size of the block frequency test")
+    parser.add_argument("-m", "--serial-m", type=int, help="pattern length of the serial test")
+    parser.add_argument("-d", "--dft-bits", type=int, default=DFT_BITS, help="bits used by the spectral test")
+    parser.add_argument("-s", "--chunk-size", type=int, default=CHUNK_SIZE, help="bytes processed at once")
+    args = parser.parse_args()
+
+    print_results(test_file(args.in_file, args.chunk_size, block_size=args.block_size, serial_m=args.serial_m, dft_bits=args.dft_bits))
@@ -0,0 +1,145 @@
+#shared command line handling of the generators: output is written chunk by chunk, so memory use does not depend on the output length
+import argparse
+import json
+import mmap
+import os
+import sys
+from time import perf_counter
+
+
+CHUNK_SIZE = 1 << 20    #default number of bytes generated at once
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("out_file", nargs="?", help="output file, '-' for stdout")
+    parser.add_argument("seed", nargs="?", type=int)
+    parser.add_argument("length", nargs="?", type=int, help="number of output bytes")
+    parser.add_argument("-s", "--chunk-size", type=int, default=CHUNK_SIZE, help="bytes generated at once")
+    parser.add_argument("-m", "--mmap", action="store_true", help="preallocate the output file and write it through a memory map")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress")
+    parser.add_argument("-c", "--checkpoint-every", type=int, default=0, metavar="BYTES",
+                        help="save the generator state to <OUTPUT FILE>.ckpt every BYTES bytes")
+    parser.add_argument("-r", "--resume", action="store_true", help="continue an interrupted run from its last checkpoint")
+    return parser
+
+
+def check(parser: argparse.ArgumentParser, args):
+    if args.length is None:
+        parser.error("the following arguments are required: out_file, seed, length")
+    if args.mmap and args.out_file == "-":
+        parser.error("--mmap needs an output file")
+    if (args.checkpoint_every or args.resume) and args.out_file == "-":
+        parser.error("checkpoints need an output file")
+
+
+#checkpoint is written only after the output it describes is on disk, so the output file is never behind it
+def save_checkpoint(args, generator, done: int):
+    path = args.out_file + ".ckpt"
+    with open(path + ".tmp", "w") as file:
+        json.dump({"generator": type(generator).__name__, "seed": args.seed, "length": args.length,
+                   "done": done, "state": generator.getState()}, file)
+    os.replace(path + ".tmp", path)
+
+
+#restores the generator from the last checkpoint (--resume), returns the number of bytes already written
+def resume(args, generator) -> int:
+    if not args.resume:
+        return 0
+    path = args.out_file + ".ckpt"
+    if not os.path.exists(path):
+        print(f"No checkpoint {path}, starting from the beginning", file=sys.stderr)
+        return 0
+
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if (checkpoint["generator"], checkpoint["seed"], checkpoint["length"]) != (type(generator).__name__, args.seed, args.length):
+        sys.exit(f"Checkpoint {path} belongs to a different run ({checkpoint['generator']}, seed {checkpoint['seed']}, {checkpoint['length']} B)")
+    try:
+        generator.setState(checkpoint["state"])
+    except ValueError as error:
+        sys.exit(f"Checkpoint {path} belongs to a different run ({error})")
+    return checkpoint["done"]
+
+
+class Progress:
+    def __init__(self, length: int, quiet: bool = False, done: int = 0):
+        self.length = length
+        self.quiet  = quiet
+        self.done   = done
+        self.start  = perf_counter()
+        self.first  = done              #bytes written before this run (resumed runs)
+        self.last   = 0
+
+    def update(self, count: int):
+        self.done += count
+        now = perf_counter()
+        if not self.quiet and (now - self.last >= 0.5 or self.done == self.length):
+            self.last = now
+            speed     = (self.done - self.first) / max(now - self.start, 1e-9)
+            percent   = self.done / self.length * 100 if self.length else 100
+            print(f"\r{percent:6.2f}% {self.done:>14} B {speed / 2**20:10.2f} MiB/s", end="", file=sys.stderr, flush=True)
+
+    def finish(self):
+        if not self.quiet:
+            print("", file=sys.stderr)
+
+
+class Checkpoints:
+    def __init__(self, args, generator, done: int):
+        self.args      = args
+        self.generator = generator
+        self.every     = args.checkpoint_every
+        self.next      = (done // self.every + 1) * self.every if self.every else None
+
+    #sync is called first to get the data written so far to disk
+    def update(self, done: int, sync):
+        if self.next is not None and (done >= self.next or done == self.args.length):
+            sync()
+            save_checkpoint(self.args, self.generator, done)
+            self.next = (done // self.every + 1) * self.every
+
+
+def write_file(chunks, file, progress: Progress, checkpoints: Checkpoints = None):
+    def sync():
+        file.flush()
+        os.fsync(file.fileno())
+
+    for chunk in chunks:
+        file.write(chunk)
+        progress.update(len(chunk))
+        if checkpoints is not None:
+            checkpoints.update(progress.done, sync)
+
+
+def write_mmap(chunks, path: str, length: int, progress: Progress, checkpoints: Checkpoints = None):
+    with open(path, "r+b" if progress.done else "w+b") as file:
+        file.truncate(length)
+        if length == 0:
+            return
+        with mmap.mmap(file.fileno(), length) as out:
+            pos = progress.done
+            for chunk in chunks:
+                out[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+                progress.update(len(chunk))
+                if checkpoints is not None:
+                    checkpoints.update(progress.done, out.flush)
+            out.flush()
+
+
+#done: bytes already in the output file (resumed runs), anything after them is overwritten
+def write(chunks, args, generator=None, done: int = 0):
+    progress    = Progress(args.length, args.quiet, done)
+    checkpoints = Checkpoints(args, generator, done) if generator is not None and args.checkpoint_every else None
+    if args.out_file == "-":
+        write_file(chunks, sys.stdout.buffer, progress)
+        sys.stdout.buffer.flush()
+    elif args.mmap:
+        write_mmap(chunks, args.out_file, args.length, progress, checkpoints)
+    else:
+        with open(args.out_file, "r+b" if done else "wb") as file:
+            file.truncate(done)
+            file.seek(done)
+            write_file(chunks, file, progress, checkpoints)
+    progress.finish()
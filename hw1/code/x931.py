@@ -1,6 +1,10 @@
 # Import AES from pycryptodome package (needs to be installed first)
 # You can use a different package for the AES computation
 from Crypto.Cipher import AES
+from time import perf_counter
+
+
+BATCH = 4096    #counter blocks encrypted by one call
 
 
 #byte array xoring taken from: https://programming-idioms.org/idiom/238/xor-byte-arrays/4146/python
@@ -10,12 +14,13 @@ def arrayXor(array_a, array_b):
 
 class X931State:
     def __init__(self, seed):
-        seed     = str(seed)                                    #convert to string
-        seed     = seed * (-(-16//len(seed)))                   #repeate the seed to fill 16bytes (aes128); -(-x//y) == ceil
-        self.V   = bytearray([int(i) for i in [*seed[:16]]])    #create bytearray of length 16 from repeating seed
-        self.K   = bytearray(reversed(self.V))                  #key is reversed vector
-        self.dt  = 0                                            #date time
-        self.aes = AES.new(self.K, AES.MODE_ECB)                #aes encryptor
+        seed         = str(seed)                                    #convert to string
+        seed         = seed * (-(-16//len(seed)))                   #repeate the seed to fill 16bytes (aes128); -(-x//y) == ceil
+        self.V       = bytearray([int(i) for i in [*seed[:16]]])    #create bytearray of length 16 from repeating seed
+        self.K       = bytearray(reversed(self.V))                  #key is reversed vector
+        self.dt      = 0                                            #date time
+        self.aes     = AES.new(self.K, AES.MODE_ECB)                #aes encryptor
+        self.pending = b""                                          #already generated bytes which were not returned yet
 
     def next(self):
         I        = self.aes.encrypt(self.dt.to_bytes(16, 'big'))    #generate I from date time (big endian)
@@ -24,8 +29,66 @@ class X931State:
         self.dt += 1                                                #update date time
         return R
 
+    #json serializable internals for checkpoints
+    def getState(self) -> dict:
+        return {"V": self.V.hex(), "K": self.K.hex(), "dt": self.dt, "pending": self.pending.hex()}
+
+    def setState(self, state: dict):
+        self.V       = bytearray.fromhex(state["V"])
+        self.K       = bytearray.fromhex(state["K"])
+        self.dt      = state["dt"]
+        self.aes     = AES.new(self.K, AES.MODE_ECB)
+        self.pending = bytes.fromhex(state["pending"])
+
+    #fill the whole (writable) buffer with output, returns the buffer
+    def generateInto(self, buffer):
+        out     = memoryview(buffer).cast("B")
+        length  = len(out)
+        pos     = min(len(self.pending), length)
+        encrypt = self.aes.encrypt
+        V       = int.from_bytes(self.V, 'big')
+
+        out[:pos]    = self.pending[:pos]
+        self.pending = self.pending[pos:]
+
+        while pos < length:
+            #I = E(dt) depends only on the counter -> encrypt a whole batch of counters as one CTR keystream
+            blocks = min(BATCH, -(-(length - pos) // 16))
+            ctr    = AES.new(self.K, AES.MODE_CTR, nonce=b"", initial_value=self.dt)
+            Is     = ctr.encrypt(bytes(16 * blocks))
+            for i in range(0, 16 * blocks, 16):
+                I = int.from_bytes(Is[i:i + 16], 'big')
+                R = encrypt((I ^ V).to_bytes(16, 'big'))
+                V = int.from_bytes(encrypt((I ^ int.from_bytes(R, 'big')).to_bytes(16, 'big')), 'big')
+                if pos + 16 <= length:
+                    out[pos:pos + 16] = R
+                else:
+                    out[pos:] = R[:length - pos]
+                    self.pending = R[length - pos:]
+                pos += 16
+            self.dt += blocks
+
+        self.V = bytearray(V.to_bytes(16, 'big'))
+        return buffer
+
 
 def generate_bytes(seed: int, length: int) -> bytes:
+    generator = X931State(seed)
+    result    = bytearray(length)
+    return bytes(generator.generateInto(result))
+
+
+#same output as generate_bytes, split into chunks of chunk_size bytes (the last one may be shorter)
+#continues from `generator` when it is given (resumed runs)
+def iter_chunks(seed: int, length: int, chunk_size: int = BATCH * 16, generator: X931State = None):
+    if generator is None:
+        generator = X931State(seed)
+    for pos in range(0, length, chunk_size):
+        yield bytes(generator.generateInto(bytearray(min(chunk_size, length - pos))))
+
+
+#the original per block loop
+def generate_bytes_reference(seed: int, length: int) -> bytes:
     generator = X931State(seed)
     result    = bytearray()
 
@@ -36,14 +99,25 @@ def generate_bytes(seed: int, length: int) -> bytes:
     return bytes(result)
 
 
+def benchmark(seed: int = 492875, length: int = 1 << 20):
+    for name, function in (("reference", generate_bytes_reference), ("batched", generate_bytes)):
+        start = perf_counter()
+        function(seed, length)
+        elapsed = perf_counter() - start
+        print(f"{name:>9}: {length / elapsed:12.0f} B/s")
+
+
 if __name__ == "__main__":
-    import sys
+    import stream
 
-    if len(sys.argv) != 4:
-        print(f"USAGE: python {sys.argv[0]} <OUTPUT FILE> <SEED> <OUTPUT BYTES>")
-    out_file = sys.argv[1]
-    seed = int(sys.argv[2])
-    length = int(sys.argv[3])
-    with open(out_file, "wb") as out_file:
-        out_file.write(generate_bytes(seed, length))
+    parser = stream.parser("ANSI X9.31 generator")
+    parser.add_argument("--benchmark", action="store_true", help="compare the batched and the original generator and exit")
+    args   = parser.parse_args()
 
+    if args.benchmark:
+        benchmark()
+    else:
+        stream.check(parser, args)
+        generator = X931State(args.seed)
+        done      = stream.resume(args, generator)
+        stream.write(iter_chunks(args.seed, args.length - done, args.chunk_size, generator), args, generator, done)
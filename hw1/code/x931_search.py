@@ -0,0 +1,100 @@
+from Crypto.Cipher import AES
+from multiprocessing import Pool
+from time import perf_counter
+import json
+import os
+
+import x931
+
+
+RANGE = 20000       #seeds checked by one worker task
+ZERO  = bytes(16)
+
+
+#X931State derives V (and K = reversed V) only from the first 16 digits of the repeated seed
+#so only seeds with at most 16 digits need to be checked, grouped by their number of digits
+def seed_ranges(digits: int, start: int = None):
+    low  = 0 if digits == 1 else 10 ** (digits - 1)
+    high = 10 ** digits
+    for begin in range(low if start is None else start, high, RANGE):
+        yield begin, min(begin + RANGE, high)
+
+
+#seeds from [start, stop) whose first output block is R
+#first block is R = E(E(0) ^ V) -> D(R) == E(0) ^ V
+def search_range(args):
+    start, stop, R = args
+    found = []
+    for seed in range(start, stop):
+        text  = str(seed)
+        text  = text * (-(-16//len(text)))
+        V     = bytes([int(i) for i in text[:16]])
+        aes   = AES.new(V[::-1], AES.MODE_ECB)
+        if int.from_bytes(aes.decrypt(R), 'big') == int.from_bytes(aes.encrypt(ZERO), 'big') ^ int.from_bytes(V, 'big'):
+            found.append(seed)
+    return stop - start, found
+
+
+def save_checkpoint(path, prefix, digits, start, found):
+    with open(path + ".tmp", "w") as file:
+        json.dump({"prefix": prefix.hex(), "digits": digits, "start": start, "found": found}, file)
+    os.replace(path + ".tmp", path)     #never leave a half written checkpoint behind
+
+
+def search(prefix: bytes, processes: int = 1, max_digits: int = 16, checkpoint: str = None, verbose: bool = True):
+    if len(prefix) < 16:
+        raise ValueError("at least one whole output block (16 bytes) is needed")
+
+    digits, start, found = 1, None, []
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint) as file:
+            state = json.load(file)
+        if bytes.fromhex(state["prefix"]) != prefix[:len(bytes.fromhex(state["prefix"]))]:
+            raise ValueError("checkpoint belongs to a different output prefix")
+        digits, start, found = state["digits"], state["start"], state["found"]
+        if verbose:
+            print(f"Resuming at {digits} digit(s), seed {start}, {len(found)} candidate(s) so far")
+
+    R       = prefix[:16]
+    checked = 0
+    begin   = perf_counter()
+    last    = begin
+    with Pool(processes) as pool:
+        while digits <= max_digits:
+            tasks = ((low, high, R) for low, high in seed_ranges(digits, start))
+            #imap keeps the order, so every finished range moves the checkpoint forward
+            for (count, seeds), (low, high) in zip(pool.imap(search_range, tasks), seed_ranges(digits, start)):
+                found.extend(seeds)
+                checked += count
+                now = perf_counter()
+                if now - last >= 5:
+                    last = now
+                    if checkpoint is not None:
+                        save_checkpoint(checkpoint, prefix, digits, high, found)
+                    if verbose:
+                        print(f"{digits:2} digits, seed {high:>17}: {checked / (now - begin):10.0f} seeds/s, {len(found)} candidate(s)", flush=True)
+            digits += 1
+            start   = None
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, prefix, digits, None, found)
+
+    #remaining observed bytes with the reference generator
+    return [seed for seed in found if x931.generate_bytes(seed, len(prefix)) == prefix]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Search X9.31 seeds consistent with an observed output prefix")
+    parser.add_argument("in_file", help="file starting with bytes produced by x931.generate_bytes")
+    parser.add_argument("-n", "--prefix", type=int, default=32, help="number of observed bytes to use (at least 16)")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count())
+    parser.add_argument("-d", "--max-digits", type=int, default=16, help="check seeds with at most this many digits")
+    parser.add_argument("-c", "--checkpoint", help="progress file, the search resumes from it if it exists")
+    args = parser.parse_args()
+
+    with open(args.in_file, "rb") as in_file:
+        prefix = in_file.read(args.prefix)
+
+    for seed in search(prefix, args.processes, args.max_digits, args.checkpoint):
+        print(f"Seed: {seed}")
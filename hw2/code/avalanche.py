@@ -0,0 +1,65 @@
+#Avalanche analysis of the Keccak-f permutations
+#all single bit flips of a state are permuted as one batch, the dependency matrix has a row per flipped input bit
+#and a column per output bit (1 -> the output bit changed)
+#width is the lane width of Keccak-f[25 * width], 64 is Keccak-f[1600]
+
+from multiprocessing import Pool
+
+import numpy as np
+
+from keccak import LANE_TYPES, KeccakPBatch
+
+
+STATE_BITS = 1600
+
+
+#(25 * width, 25 * width / 8) states, row i is state with bit i flipped (bit i % 8 of byte i // 8, same as task4)
+def flipped(state, width=64):
+    states = np.tile(np.frombuffer(bytes(state), dtype=np.uint8), (25 * width, 1))
+    bits   = np.arange(25 * width)
+    states[bits, bits // 8] ^= (1 << (bits % 8)).astype(np.uint8)
+    return states
+
+
+#flip to output dependency matrix of one state (after the given number of rounds, all of them when None)
+def matrix(state, rounds=None, width=64):
+    base   = np.frombuffer(bytes(state), dtype=np.uint8).copy()
+    states = flipped(state, width)
+    KeccakPBatch(base.view(LANE_TYPES[width]).reshape(1, -1), width, rounds)
+    KeccakPBatch(states.view(LANE_TYPES[width]), width, rounds)
+    return np.unpackbits(states ^ base, axis=1, bitorder="little")
+
+
+#changed output bits for each flipped input bit
+def counts(state, rounds=None, width=64):
+    return matrix(state, rounds, width).sum(axis=1, dtype=np.int64)
+
+
+def statistics(changed, bits=STATE_BITS):
+    changed = np.asarray(changed)
+    return {"min": int(changed.min()), "max": int(changed.max()), "avg": float(changed.mean()),
+            "histogram": np.bincount(changed.ravel(), minlength=bits + 1)}
+
+
+#sum of the dependency matrices and the changed bit counts of count random states (drawn from seed)
+def randomMatrices(task):
+    seed, count, rounds, width = task
+    rng    = np.random.default_rng(seed)
+    total  = np.zeros((25 * width, 25 * width), dtype=np.uint32)
+    change = []
+    for i in range(count):
+        dependency = matrix(rng.integers(0, 256, 25 * width // 8, dtype=np.uint8).tobytes(), rounds, width)
+        total  += dependency
+        change.append(dependency.sum(axis=1, dtype=np.int64))
+    return total, np.concatenate(change)
+
+
+#averages over count random base states in a process pool, returns (probability matrix, statistics of all flips)
+def average(count, processes=None, seed=None, rounds=None, width=64):
+    processes = processes or 1
+    seeds     = np.random.SeedSequence(seed).spawn(processes)
+    shares    = [count // processes + (i < count % processes) for i in range(processes)]
+    with Pool(processes) as pool:
+        results = pool.map(randomMatrices, [(seed, share, rounds, width) for seed, share in zip(seeds, shares) if share])
+    total = sum(result[0].astype(np.uint64) for result in results)
+    return total / count, statistics(np.concatenate([result[1] for result in results]), 25 * width)
@@ -0,0 +1,510 @@
+#Capacity collision search helpers shared by the task3 scripts
+#Candidates are stored as (capacity, message id) pairs of uint64 -> 16 bytes per entry instead of the whole message,
+#messages are derived from a seed and their id and only the colliding pair is ever regenerated
+
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from time import monotonic, perf_counter
+
+from keccak import LANE_TYPES, KeccakPBatch, KeccakPInverseBatch, customKeccakState
+
+
+KEY_BYTES = 8       #capacities up to 64 bits are packed into one uint64 key
+
+
+#message number index of a search started from seed (any bytes)
+def message(seed, index, length):
+    return hashlib.shake_128(seed + int(index).to_bytes(8, "little")).digest(length)
+
+
+def messages(seed, start, count, length):
+    return [message(seed, index, length) for index in range(start, start + count)]
+
+
+#packs the capacity part of the absorbed states ((N, state bytes) uint8) into uint64 keys
+def capacityKeys(states, capacity):
+    width = capacity // 8
+    if width > KEY_BYTES:
+        raise ValueError(f"capacity {capacity} does not fit into a {8*KEY_BYTES} bit key")
+    states = np.atleast_2d(np.asarray(states, dtype=np.uint8))
+    packed = np.zeros((len(states), KEY_BYTES), dtype=np.uint8)
+    packed[:, :width] = states[:, states.shape[1]-width:]
+    return packed.view("<u8").ravel()
+
+
+#capacity of a single absorbed state as a key
+def capacityKey(state, capacity):
+    return int(capacityKeys(np.frombuffer(bytes(state), dtype=np.uint8), capacity)[0])
+
+
+#capacity keys and message ids appended to preallocated buffers that grow geometrically, the filled part is a list
+#of sorted runs, a run is merged with the previous one once it is as long (each entry is merged log(n) times)
+#and new batches are checked with a binary search in every run
+class CollisionTable:
+    def __init__(self, size=1 << 16):
+        self.keyBuffer = np.empty(size, dtype=np.uint64)
+        self.idBuffer  = np.empty(size, dtype=np.uint64)
+        self.runs      = [0]    #boundaries of the sorted runs, the last one is the number of entries
+
+    def __len__(self):
+        return self.runs[-1]
+
+    @property
+    def keys(self):
+        return self.keyBuffer[:self.runs[-1]]
+
+    @property
+    def ids(self):
+        return self.idBuffer[:self.runs[-1]]
+
+    @property
+    def nbytes(self):
+        return self.keyBuffer.nbytes + self.idBuffer.nbytes
+
+    def stats(self):
+        return f"{len(self)} entries, {self.nbytes >> 20} MiB"
+
+    #appends a batch of sorted keys as a new run and merges the runs of similar length
+    def append(self, keys, ids):
+        start, end = self.runs[-1], self.runs[-1] + len(keys)
+        if end > len(self.keyBuffer):
+            size = max(end, 2 * len(self.keyBuffer))
+            for name in ("keyBuffer", "idBuffer"):
+                buffer = np.empty(size, dtype=np.uint64)
+                buffer[:start] = getattr(self, name)[:start]
+                setattr(self, name, buffer)
+        self.keyBuffer[start:end] = keys
+        self.idBuffer[start:end]  = ids
+        self.runs.append(end)
+
+        while len(self.runs) > 2 and self.runs[-2] - self.runs[-3] <= self.runs[-1] - self.runs[-2]:
+            start, end = self.runs[-3], self.runs[-1]
+            order = np.argsort(self.keyBuffer[start:end], kind="stable")     #two sorted runs -> a linear merge
+            self.keyBuffer[start:end] = self.keyBuffer[start:end][order]
+            self.idBuffer[start:end]  = self.idBuffer[start:end][order]
+            del self.runs[-2]
+
+    #(index into keys, stored id) of the first of the keys that is already stored or None, nothing is added
+    def find(self, keys):
+        keys = np.asarray(keys, dtype=np.uint64)
+        for start, end in zip(self.runs, self.runs[1:]):
+            run       = self.keyBuffer[start:end]
+            positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found     = np.flatnonzero(run[positions] == keys)
+            if len(found):
+                return int(found[0]), int(self.idBuffer[start + positions[found[0]]])
+        return None
+
+    #adds a batch of keys with their ids, returns (stored id, new id) of the first collision or None
+    def add(self, keys, ids):
+        keys  = np.asarray(keys, dtype=np.uint64)
+        ids   = np.asarray(ids, dtype=np.uint64)
+        order = np.argsort(keys, kind="stable")
+        keys  = keys[order]
+        ids   = ids[order]
+
+        #collision with an already stored key
+        match = self.find(keys)
+        if match is not None:
+            return match[1], int(ids[match[0]])
+
+        #collision inside of the batch
+        found = np.flatnonzero(keys[1:] == keys[:-1])
+        if len(found):
+            index = found[0]
+            return int(ids[index]), int(ids[index + 1])
+
+        self.append(keys, ids)
+        return None
+
+    #adds a batch of keys with their ids without looking for collisions
+    def insert(self, keys, ids):
+        keys  = np.asarray(keys, dtype=np.uint64)
+        order = np.argsort(keys, kind="stable")
+        self.append(keys[order], np.asarray(ids, dtype=np.uint64)[order])
+
+
+#=== Disk backed table ===
+#entries are partitioned into buckets by the low bits of the capacity, every bucket is a stack of sorted runs on disk
+#(bucket-XXXX-LL.bin, level LL holds about 2^LL flushes like a binary counter), new entries are collected in memory and
+#looked up with a binary search in the (memory mapped) runs when they are flushed together with a checkpoint of the search
+#a run file is the sorted uint64 keys followed by their ids, so the keys can be searched without copying them
+
+ENTRY  = 16         #bytes of a stored (key, id) pair
+FLUSH  = 1 << 20    #in memory entries that trigger a flush to the bucket files
+
+
+class DiskCollisionTable:
+    def __init__(self, directory, capacity, bits=8, flush=FLUSH):
+        self.directory  = directory
+        self.checkpoint = os.path.join(directory, "checkpoint.json")
+        self.flushSize  = flush
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.checkpoint):
+            with open(self.checkpoint) as f:
+                saved = json.load(f)
+            if (saved["capacity"], saved["bits"]) != (capacity, bits):
+                raise ValueError(f"{directory} holds a search with capacity {saved['capacity']} and {saved['bits']} bucket bits")
+            self.seed = bytes.fromhex(saved["seed"])
+            self.next = saved["next"]
+        else:
+            self.seed = os.urandom(16)
+            self.next = 0
+
+        self.capacity = capacity
+        self.bits     = bits
+        self.mask     = np.uint64((1 << bits) - 1)
+        self.levels   = [dict() for index in range(1 << bits)]     #bucket -> {level: entries in its run}
+        for name in os.listdir(directory):
+            if name.startswith("bucket-") and name.endswith(".bin"):
+                index, level = name[7:-4].split("-")
+                self.levels[int(index, 16)][int(level)] = os.path.getsize(os.path.join(directory, name)) // ENTRY
+        self.sizes    = np.array([sum(levels.values()) for levels in self.levels], dtype=np.int64)
+        self.pending  = CollisionTable()
+        self.ranges   = dict()      #start -> end of added id ranges above self.next
+        self.resumed  = perf_counter()
+        self.hashed   = 0
+        self.save()
+
+    def bucket(self, index, level):
+        return os.path.join(self.directory, f"bucket-{index:04x}-{level:02d}.bin")
+
+    def __len__(self):
+        return int(self.sizes.sum()) + len(self.pending)
+
+    #all ids below next are stored, the search is resumed from there
+    def save(self):
+        with open(self.checkpoint + ".tmp", "w") as f:
+            json.dump({"seed": self.seed.hex(), "next": self.next, "capacity": self.capacity, "bits": self.bits}, f)
+        os.replace(self.checkpoint + ".tmp", self.checkpoint)
+
+    #adds a contiguous range of ids with their keys, returns (stored id, new id) of the first collision or None
+    def add(self, keys, ids):
+        ids = np.arange(ids.start, ids.stop, dtype=np.uint64) if isinstance(ids, range) else np.asarray(ids, dtype=np.uint64)
+        match = self.pending.add(keys, ids)
+        if match is not None:
+            return match
+        self.hashed += len(ids)
+        if len(ids):
+            self.ranges[int(ids[0])] = int(ids[-1]) + 1
+        if len(self.pending) >= self.flushSize:
+            return self.flush()
+        return None
+
+    #(keys, ids) of a stored run
+    def run(self, index, level):
+        size = self.levels[index][level]
+        return (np.memmap(self.bucket(index, level), dtype="<u8", mode="r", shape=(size,)),
+                np.memmap(self.bucket(index, level), dtype="<u8", mode="r", offset=8*size, shape=(size,)))
+
+    #sorted keys of a bucket with their ids that are not stored yet (same key and id -> hashed again after a resume)
+    #and the first collision with a stored entry or None
+    def lookup(self, index, keys, ids):
+        fresh = np.ones(len(keys), dtype=bool)
+        match = None
+        for level in self.levels[index]:
+            storedKeys, storedIds = self.run(index, level)
+            positions = np.minimum(np.searchsorted(storedKeys, keys), len(storedKeys) - 1)
+            same      = storedKeys[positions] == keys
+            known     = np.zeros(len(keys), dtype=bool)
+            known[same] = storedIds[positions[same]] == ids[same]
+            fresh    &= ~known
+            collided  = np.flatnonzero(same & ~known)
+            if match is None and len(collided):
+                match = int(storedIds[positions[collided[0]]]), int(ids[collided[0]])
+            del storedKeys, storedIds
+        return keys[fresh], ids[fresh], match
+
+    #pushes a sorted run onto the levels of a bucket, equal levels are merged into the next one (each entry is
+    #rewritten log(flushes) times), a merged run is written before the runs it replaces are removed
+    def push(self, index, keys, ids):
+        level, merged = 0, []
+        while level in self.levels[index]:
+            storedKeys, storedIds = self.run(index, level)
+            keys    = np.concatenate([storedKeys, keys])
+            ids     = np.concatenate([storedIds, ids])
+            del storedKeys, storedIds
+            order   = np.argsort(keys, kind="stable")
+            keys, ids = keys[order], ids[order]
+            unique  = np.ones(len(keys), dtype=bool)     #copies left by a flush interrupted before the removal
+            unique[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+            keys, ids = keys[unique], ids[unique]
+            merged.append(level)
+            level += 1
+        path = self.bucket(index, level)
+        np.concatenate([keys, ids]).astype("<u8").tofile(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.levels[index][level] = len(keys)
+        for level in merged:
+            os.remove(self.bucket(index, level))
+            del self.levels[index][level]
+
+    #checks the in memory entries against the buckets, adds them and saves the checkpoint
+    def flush(self):
+        buckets = (self.pending.keys & self.mask).astype(np.int64)
+        order   = np.lexsort((self.pending.keys, buckets))      #by bucket, sorted by key in every bucket
+        keys    = self.pending.keys[order]
+        ids     = self.pending.ids[order]
+        bounds  = np.searchsorted(buckets[order], np.arange((1 << self.bits) + 1))
+        match   = None
+
+        for index in np.flatnonzero(bounds[1:] != bounds[:-1]):
+            selected = slice(bounds[index], bounds[index + 1])
+            freshKeys, freshIds, collision = self.lookup(index, keys[selected], ids[selected])
+            if match is None:
+                match = collision
+            if len(freshKeys):
+                self.push(index, freshKeys, freshIds)
+                self.sizes[index] = sum(self.levels[index].values())
+
+        self.pending = CollisionTable()
+        while self.next in self.ranges:
+            self.next = self.ranges.pop(self.next)
+        self.save()
+        return match
+
+    def stats(self):
+        fill = self.sizes + np.bincount((self.pending.keys & self.mask).astype(np.int64), minlength=len(self.sizes))
+        rate = self.hashed / max(perf_counter() - self.resumed, 1e-9)
+        return f"{len(self)} entries, bucket fill {fill.min()}/{fill.mean():.1f}/{fill.max()} (min/avg/max), {rate:.0f} hashes/s since resume"
+
+
+#=== Coordinator of a distributed search ===
+#hands out ranges of message ids, workers return only the packed capacities, ranges of workers that left
+#(did not answer within timeout seconds) are handed out again
+
+class Coordinator:
+    def __init__(self, table, seed, start=0, batch=4096, timeout=60):
+        self.table       = table
+        self.seed        = seed
+        self.next        = start
+        self.batch       = batch
+        self.timeout     = timeout
+        self.outstanding = dict()   #start -> time it was handed out
+        self.match       = None
+        self.found       = threading.Event()
+        self.lock        = threading.Lock()
+
+    #(seed, start, count) of the next range to hash or None once a collision was found
+    def task(self):
+        with self.lock:
+            if self.match is not None:
+                return None
+            now = monotonic()
+            for start, issued in self.outstanding.items():
+                if now - issued > self.timeout:
+                    self.outstanding[start] = now
+                    return self.seed, start, self.batch
+            start = self.next
+            self.next += self.batch
+            self.outstanding[start] = now
+            return self.seed, start, self.batch
+
+    #packed capacities (bytes of uint64) of a handed out range, returns the colliding ids once there are any
+    def submit(self, start, keys):
+        with self.lock:
+            if self.match is not None or self.outstanding.pop(start, None) is None:     #late answer of a reissued range
+                return self.match
+            keys  = np.frombuffer(keys, dtype=np.uint64)
+            match = self.table.add(keys, range(start, start + len(keys)))
+            if match is not None:
+                self.match = match
+                self.found.set()
+            return self.match
+
+    def result(self):
+        return self.match
+
+    def stats(self):
+        with self.lock:
+            return f"{self.table.stats()}, {len(self.outstanding)} ranges out"
+
+
+#=== Distinguished points (van Oorschot-Wiener) ===
+#the walk maps a capacity to the capacity after absorbing the message derived from it -> a collision of the walk
+#is a pair of different messages with the same capacity, only trail starts and ends (distinguished points) are stored
+
+MAX_TRAIL = 20      #trails longer than MAX_TRAIL * 2^bits are most likely in a cycle and are abandoned
+
+
+#one step of all the walks in keys (uint64 array) at once, with a single batched permutation of Keccak-f[25 * width]
+#(only the absorbed state of the one block messages is needed, no padding block and no squeezing)
+def walk(seed, keys, capacity, width=64):
+    states = rateStates(seed, keys.tolist(), capacity, width)
+    KeccakPBatch(states.view(LANE_TYPES[width]), width)
+    return capacityKeys(states, capacity)
+
+
+def randomKeys(rng, count, capacity):
+    return rng.integers(0, 1 << min(capacity, 8*KEY_BYTES), count, dtype=np.uint64)
+
+
+#walks trails from random starts in lockstep for the given number of steps, yields (start, distinguished point, length)
+#of every finished trail, finished or abandoned trails are restarted from a new random start
+def trails(seed, rng, count, steps, capacity, bits, width=64):
+    mask    = np.uint64((1 << bits) - 1)
+    limit   = MAX_TRAIL << bits
+    starts  = randomKeys(rng, count, capacity)
+    keys    = starts.copy()
+    lengths = np.zeros(count, dtype=np.int64)
+    for step in range(steps):
+        keys     = walk(seed, keys, capacity, width)
+        lengths += 1
+        finished = (keys & mask) == 0
+        for index in np.flatnonzero(finished):
+            yield int(starts[index]), int(keys[index]), int(lengths[index])
+        restart = np.flatnonzero(finished | (lengths >= limit))
+        starts[restart]  = randomKeys(rng, len(restart), capacity)
+        keys[restart]    = starts[restart]
+        lengths[restart] = 0
+
+
+#walks two trails ending in the same distinguished point until they merge, returns the two different keys
+#walking into the same capacity, or None when one start lies on the other trail
+def locate(seed, trail1, trail2, capacity, width=64):
+    (key1, length1), (key2, length2) = trail1, trail2
+    if length1 < length2:
+        (key1, length1), (key2, length2) = (key2, length2), (key1, length1)
+    for step in range(length1 - length2):
+        key1 = int(walk(seed, np.array([key1], dtype=np.uint64), capacity, width)[0])
+    while key1 != key2:
+        next1, next2 = walk(seed, np.array([key1, key2], dtype=np.uint64), capacity, width).tolist()
+        if next1 == next2:
+            return key1, key2
+        key1, key2 = next1, next2
+    return None
+
+
+#distinguished point -> (start, length) of the first trail that reached it
+class DistinguishedPoints:
+    def __init__(self):
+        self.points = dict()
+        self.trails = 0
+        self.length = 0     #walk steps of all the stored trails
+
+    def __len__(self):
+        return len(self.points)
+
+    #returns the stored trail (start, length) when a different trail already reached the same point
+    def add(self, start, point, length):
+        self.trails += 1
+        self.length += length
+        if point in self.points:
+            stored = self.points[point]
+            if stored[0] != start:
+                return stored
+            return None
+        self.points[point] = (start, length)
+        return None
+
+
+#=== Meet in the middle ===
+#forward:  states after absorbing the one block messages message(seed, i)
+#backward: states f^-1(rate || target) for the rate parts message(seed + BACKWARD, j) and a chosen target capacity
+#equal capacities of forward state i and backward state j connect message i through a second block (xor of the two
+#rate parts) to a state with the target capacity -> about 2 * 2^(c/2) permutations instead of 2^c for a chosen capacity
+
+BACKWARD = b"backward"
+
+
+#(count, state bytes) uint8 states with the rate parts of the messages ids (a range or a list) of seed and zero capacity
+def rateStates(seed, ids, capacity, width=64):
+    rateBytes = (25*width - capacity) // 8
+    states    = np.zeros((len(ids), 25*width // 8), dtype=np.uint8)
+    states[:, :rateBytes] = np.frombuffer(b"".join(message(seed, index, rateBytes) for index in ids), dtype=np.uint8).reshape(len(ids), rateBytes)
+    return states
+
+
+#states after absorbing the one block messages start..start+count of seed
+def forwardStates(seed, start, count, capacity, width=64):
+    states = rateStates(seed, range(start, start + count), capacity, width)
+    KeccakPBatch(states.view(LANE_TYPES[width]), width)
+    return states
+
+
+#target is the capacity part (capacity / 8 bytes) the backward states lead to
+def backwardStates(seed, start, count, capacity, target, width=64):
+    states = rateStates(seed + BACKWARD, range(start, start + count), capacity, width)
+    states[:, states.shape[1] - capacity//8:] = np.frombuffer(bytes(target), dtype=np.uint8)
+    KeccakPInverseBatch(states.view(LANE_TYPES[width]), width)
+    return states
+
+
+#grows the forward and the backward table by batch states each until they meet, returns (forward id, backward id)
+def meetInTheMiddle(seed, target, capacity, batch=1 << 12, width=64):
+    forward, backward = CollisionTable(), CollisionTable()
+    start = 0
+    while True:
+        ids  = np.arange(start, start + batch, dtype=np.uint64)
+        keys = capacityKeys(forwardStates(seed, start, batch, capacity, width), capacity)
+        match = backward.find(keys)
+        if match is not None:
+            return int(ids[match[0]]), match[1]
+        forward.insert(keys, ids)
+
+        keys = capacityKeys(backwardStates(seed, start, batch, capacity, target, width), capacity)
+        match = forward.find(keys)
+        if match is not None:
+            return match[1], int(ids[match[0]])
+        backward.insert(keys, ids)
+        start += batch
+
+
+#two block message of a meetInTheMiddle result, its absorbed state has the target capacity
+def connect(seed, forwardId, backwardId, capacity, target, width=64):
+    rateBytes = (25*width - capacity) // 8
+    start     = forwardStates(seed, forwardId, 1, capacity, width)[0]
+    end       = backwardStates(seed, backwardId, 1, capacity, target, width)[0]
+    return message(seed, forwardId, rateBytes) + (start[:rateBytes] ^ end[:rateBytes]).tobytes()
+
+
+#=== Results ===
+
+def printHex(byte_data):
+    for byte in byte_data:
+        print(f"{byte:02x}", end="")
+    print("")
+
+
+#byte array xoring taken from: https://programming-idioms.org/idiom/238/xor-byte-arrays/4146/python
+def arrayXor(array_a, array_b):
+    return bytes([a ^ b for a, b in zip(array_a, array_b)])
+
+
+#extends two messages with the same capacity by one block each so that their whole states (and hashes) are equal,
+#prints both messages with their hashes and writes them to ms1.txt, hash1.txt, ms2.txt and hash2.txt
+def extendCollision(ms1, ms2, capacity, hash_len, width=64):
+    state1 = customKeccakState(ms1, capacity, hash_len, width)[1]
+    state2 = customKeccakState(ms2, capacity, hash_len, width)[1]
+
+    #create some suffix for first message
+    suffix1 = b'\x37'
+    suffix1 = suffix1 + bytes("\x00" * (25*width//8 - len(suffix1)), "utf-8")  #pad the sufix
+
+    #xor state of first message with random message -> internal state after second xor
+    new_state = arrayXor(suffix1, state1)
+
+    #xor result ^ with state from second message -> what we need to xor the second message state with
+    suffix2 = arrayXor(new_state, state2)
+
+    ms1 = ms1 + suffix1
+    ms2 = ms2 + suffix2
+
+    print("Results:")
+    for number, ms in ((1, ms1), (2, ms2)):
+        if number > 1:
+            print("")
+        print(f"msg{number}:")
+        hash = customKeccakState(ms, capacity, hash_len, width)[0]
+        printHex(ms)
+        printHex(hash)
+
+        with open(f"ms{number}.txt", "w") as f:
+            f.write(ms.hex())
+        with open(f"hash{number}.txt", "w") as f:
+            f.write(hash.hex())
+    return ms1, ms2
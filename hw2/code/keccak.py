@@ -0,0 +1,842 @@
+# -*- coding: utf-8 -*-
+# Implementation by Gilles Van Assche, hereby denoted as "the implementer".
+#
+# For more information, feedback or questions, please refer to our website:
+# https://keccak.team/
+#
+# To the extent possible under law, the implementer has waived all copyright
+# and related or neighboring rights to the source code in this file.
+# http://creativecommons.org/publicdomain/zero/1.0/
+
+#Shared Keccak implementation of all hw2 scripts, based on: https://github.com/XKCP/XKCP/blob/master/Standalone/CompactFIPS202/Python/CompactFIPS202_numpy.py
+
+import hashlib
+import numpy as np
+import struct
+from math import log2
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from time import perf_counter
+
+
+KECCAK_BYTES = 200
+KECCAK_LANES = 25
+KECCAK_PLANES_SLICES = 5
+
+THETA_REORDER = ((4, 0, 1, 2, 3), (1, 2, 3, 4, 0))
+
+#Iota Step Round Constants For Keccak-p(1600, 24)
+IOTA_CONSTANTS = np.array([0x0000000000000001,0x0000000000008082, 0x800000000000808A,
+                            0x8000000080008000, 0x000000000000808B, 0x0000000080000001,
+                            0x8000000080008081, 0x8000000000008009, 0x000000000000008A,
+                            0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+                            0x000000008000808B, 0x800000000000008B, 0x8000000000008089,
+                            0x8000000000008003, 0x8000000000008002, 0x8000000000000080,
+                            0x000000000000800A, 0x800000008000000A, 0x8000000080008081,
+                            0x8000000000008080, 0x0000000080000001, 0x8000000080008008],
+                          dtype=np.uint64)
+
+#Lane Shifts for Rho Step
+RHO_SHIFTS = np.array([[0, 36, 3, 41, 18],
+                       [1, 44, 10, 45, 2],
+                       [62, 6, 43, 15, 61],
+                       [28, 55, 25, 21, 56],
+                       [27, 20, 39, 8, 14]], dtype=np.uint64)
+
+#Lane Re-order Mapping for Chi Step
+CHI_REORDER = ((1, 2, 3, 4, 0), (2, 3, 4, 0, 1))
+
+#Row Re-order Mapping for Pi Step
+PI_ROW_REORDER = np.array([[0, 3, 1, 4, 2],
+                           [1, 4, 2, 0, 3],
+                           [2, 0, 3, 1, 4],
+                           [3, 1, 4, 2, 0],
+                           [4, 2, 0, 3, 1]])
+
+#Column Re-order Mapping for Pi Step
+PI_COLUMN_REORDER = np.array([[0, 0, 0, 0, 0],
+                              [1, 1, 1, 1, 1],
+                              [2, 2, 2, 2, 2],
+                              [3, 3, 3, 3, 3],
+                              [4, 4, 4, 4, 4]])
+
+
+ROUNDS      = 24
+TRACE_STEPS = ("theta", "rho", "pi", "chi", "iota")
+
+
+#Keccak-p with more rounds than Keccak-f would index the round constants from the back -> rejected everywhere
+def checkRounds(rounds, full=ROUNDS):
+    if not 0 <= rounds <= full:
+        raise ValueError(f"rounds must be between 0 and {full}, got {rounds}")
+    return rounds
+
+
+#preallocated trace of the state (25 lanes in byte string order) after every step of every round
+#for `count` states of a batch the shape is (count, rounds, 5, 25)
+def traceArray(rounds=ROUNDS, count=None, width=64):
+    shape = (rounds, len(TRACE_STEPS), KECCAK_LANES)
+    return np.zeros(shape if count is None else (count,) + shape, dtype=LANE_TYPES[width])
+
+
+#Keccak-p[1600, rounds] (the last `rounds` rounds of Keccak-f[1600]), every step is recorded into trace if given
+def KeccakF1600(state, rounds=ROUNDS, trace=None):
+    checkRounds(rounds)
+    state = np.copy(np.frombuffer(state, dtype=np.uint64, count=25).reshape([5, 5], order='F'))
+    for trace_round, round_num in enumerate(range(ROUNDS - rounds, ROUNDS)):
+        # theta_step:
+        # Exclusive-or each slice-lane by state based permutation value
+        array_shift = state << 1 | state >> 63
+        state ^= np.bitwise_xor.reduce(state[THETA_REORDER[0], ], 1, keepdims=True) ^ np.bitwise_xor.reduce(array_shift[THETA_REORDER[1], ], 1, keepdims=True)
+        if trace is not None:
+            trace[trace_round, 0] = state.ravel(order='F')
+
+        # rho_step:
+        # Left Rotate each lane by pre-calculated value
+        state = state << RHO_SHIFTS | state >> np.uint64(64 - RHO_SHIFTS)
+        if trace is not None:
+            trace[trace_round, 1] = state.ravel(order='F')
+
+        # pi_step:
+        # Shuffle lanes to pre-calculated positions
+        state = state[PI_ROW_REORDER, PI_COLUMN_REORDER]
+        if trace is not None:
+            trace[trace_round, 2] = state.ravel(order='F')
+
+        # chi_step:
+        # Exclusive-or each individual lane based on and/invert permutation
+        state ^= ~state[CHI_REORDER[0], ] & state[CHI_REORDER[1], ]
+        if trace is not None:
+            trace[trace_round, 3] = state.ravel(order='F')
+
+        # iota_step:
+        # Exclusive-or first lane of state with round constant
+        state[0, 0] ^= IOTA_CONSTANTS[round_num]
+        if trace is not None:
+            trace[trace_round, 4] = state.ravel(order='F')
+
+    return bytearray(state.tobytes(order='F'))
+
+
+#Lanes of the state as python ints for the scalar permutation
+LANES       = struct.Struct("<25Q")
+LANE_MASK   = (1 << 64) - 1
+IOTA_INTS   = [int(constant) for constant in IOTA_CONSTANTS]
+
+
+#Keccak-f[1600] on python int lanes, the (writable) buffer is permuted in place and returned
+#fully unrolled, the lanes are local variables and the rho rotations and pi destinations are written out per lane
+#(no trace, the steps are fused)
+def KeccakF1600Fast(state, rounds=ROUNDS):
+    if rounds != ROUNDS:
+        checkRounds(rounds)
+    a0, a1, a2, a3, a4, a5, a6, a7, a8, a9, a10, a11, a12, a13, a14, a15, a16, a17, a18, a19, a20, a21, a22, a23, a24 = LANES.unpack_from(state)
+    for constant in (IOTA_INTS if rounds == ROUNDS else IOTA_INTS[ROUNDS - rounds:]):
+        # theta_step:
+        c0 = a0 ^ a5 ^ a10 ^ a15 ^ a20
+        c1 = a1 ^ a6 ^ a11 ^ a16 ^ a21
+        c2 = a2 ^ a7 ^ a12 ^ a17 ^ a22
+        c3 = a3 ^ a8 ^ a13 ^ a18 ^ a23
+        c4 = a4 ^ a9 ^ a14 ^ a19 ^ a24
+        d0 = c4 ^ ((c1 << 1 | c1 >> 63) & LANE_MASK)
+        d1 = c0 ^ ((c2 << 1 | c2 >> 63) & LANE_MASK)
+        d2 = c1 ^ ((c3 << 1 | c3 >> 63) & LANE_MASK)
+        d3 = c2 ^ ((c4 << 1 | c4 >> 63) & LANE_MASK)
+        d4 = c3 ^ ((c0 << 1 | c0 >> 63) & LANE_MASK)
+
+        # rho_step and pi_step (theta is applied on the way):
+        b0  = a0 ^ d0
+        t   = a6 ^ d1
+        b1  = (t << 44 | t >> 20) & LANE_MASK
+        t   = a12 ^ d2
+        b2  = (t << 43 | t >> 21) & LANE_MASK
+        t   = a18 ^ d3
+        b3  = (t << 21 | t >> 43) & LANE_MASK
+        t   = a24 ^ d4
+        b4  = (t << 14 | t >> 50) & LANE_MASK
+        t   = a3 ^ d3
+        b5  = (t << 28 | t >> 36) & LANE_MASK
+        t   = a9 ^ d4
+        b6  = (t << 20 | t >> 44) & LANE_MASK
+        t   = a10 ^ d0
+        b7  = (t << 3 | t >> 61) & LANE_MASK
+        t   = a16 ^ d1
+        b8  = (t << 45 | t >> 19) & LANE_MASK
+        t   = a22 ^ d2
+        b9  = (t << 61 | t >> 3) & LANE_MASK
+        t   = a1 ^ d1
+        b10 = (t << 1 | t >> 63) & LANE_MASK
+        t   = a7 ^ d2
+        b11 = (t << 6 | t >> 58) & LANE_MASK
+        t   = a13 ^ d3
+        b12 = (t << 25 | t >> 39) & LANE_MASK
+        t   = a19 ^ d4
+        b13 = (t << 8 | t >> 56) & LANE_MASK
+        t   = a20 ^ d0
+        b14 = (t << 18 | t >> 46) & LANE_MASK
+        t   = a4 ^ d4
+        b15 = (t << 27 | t >> 37) & LANE_MASK
+        t   = a5 ^ d0
+        b16 = (t << 36 | t >> 28) & LANE_MASK
+        t   = a11 ^ d1
+        b17 = (t << 10 | t >> 54) & LANE_MASK
+        t   = a17 ^ d2
+        b18 = (t << 15 | t >> 49) & LANE_MASK
+        t   = a23 ^ d3
+        b19 = (t << 56 | t >> 8) & LANE_MASK
+        t   = a2 ^ d2
+        b20 = (t << 62 | t >> 2) & LANE_MASK
+        t   = a8 ^ d3
+        b21 = (t << 55 | t >> 9) & LANE_MASK
+        t   = a14 ^ d4
+        b22 = (t << 39 | t >> 25) & LANE_MASK
+        t   = a15 ^ d0
+        b23 = (t << 41 | t >> 23) & LANE_MASK
+        t   = a21 ^ d1
+        b24 = (t << 2 | t >> 62) & LANE_MASK
+
+        # chi_step:
+        a0 = b0 ^ (~b1 & b2)
+        a1 = b1 ^ (~b2 & b3)
+        a2 = b2 ^ (~b3 & b4)
+        a3 = b3 ^ (~b4 & b0)
+        a4 = b4 ^ (~b0 & b1)
+        a5 = b5 ^ (~b6 & b7)
+        a6 = b6 ^ (~b7 & b8)
+        a7 = b7 ^ (~b8 & b9)
+        a8 = b8 ^ (~b9 & b5)
+        a9 = b9 ^ (~b5 & b6)
+        a10 = b10 ^ (~b11 & b12)
+        a11 = b11 ^ (~b12 & b13)
+        a12 = b12 ^ (~b13 & b14)
+        a13 = b13 ^ (~b14 & b10)
+        a14 = b14 ^ (~b10 & b11)
+        a15 = b15 ^ (~b16 & b17)
+        a16 = b16 ^ (~b17 & b18)
+        a17 = b17 ^ (~b18 & b19)
+        a18 = b18 ^ (~b19 & b15)
+        a19 = b19 ^ (~b15 & b16)
+        a20 = b20 ^ (~b21 & b22)
+        a21 = b21 ^ (~b22 & b23)
+        a22 = b22 ^ (~b23 & b24)
+        a23 = b23 ^ (~b24 & b20)
+        a24 = b24 ^ (~b20 & b21)
+
+        # iota_step:
+        a0 ^= constant
+
+    LANES.pack_into(state, 0, a0, a1, a2, a3, a4, a5, a6, a7, a8, a9, a10, a11, a12, a13, a14, a15, a16, a17, a18, a19, a20, a21, a22, a23, a24)
+    return state
+
+
+#Pi Step mapping for lanes indexed [y, x] (as the lanes of the byte string) instead of [x, y]
+PI_ROW_REORDER_YX    = PI_COLUMN_REORDER.T
+PI_COLUMN_REORDER_YX = PI_ROW_REORDER.T
+
+BATCH_TILE = 512    #states permuted together, larger batches are split so the working set stays in cache
+
+#Keccak-f[25w] for the lane widths w: Keccak-f[200], [400], [800] and [1600]
+LANE_TYPES = {8: np.uint8, 16: np.uint16, 32: np.uint32, 64: np.uint64}
+
+
+#(lane dtype, rounds, round constants, rho left and right shifts, theta rotation shifts) of Keccak-f[25 * width]
+#12 + 2l rounds, rotation offsets mod w and the round constants truncated to w bits
+@lru_cache(maxsize=None)
+def widthConstants(width):
+    if width not in LANE_TYPES:
+        raise ValueError(f"unsupported lane width {width}, available: {', '.join(map(str, LANE_TYPES))}")
+    dtype  = LANE_TYPES[width]
+    rounds = 12 + 2 * int(log2(width))
+    iota   = (IOTA_CONSTANTS[:rounds] & np.uint64((1 << width) - 1)).astype(dtype)
+    left   = (RHO_SHIFTS.T % width)[:, :, None]
+    return dtype, rounds, iota, left.astype(dtype), (width - left).astype(dtype), dtype(1), dtype(width - 1)
+
+
+#Keccak-p[25 * width, rounds] applied to every row of an (N, 25) array of lanes (dtype of the width) at once,
+#rows are permuted in place and returned, rounds are the last `rounds` of Keccak-f (all of them when None)
+#same steps as KeccakF1600, with every lane being a vector over the batch (lanes indexed [y, x, n])
+#every step is recorded into trace (of traceArray(rounds, N, width)) if given
+def KeccakPBatch(states, width=64, rounds=None, trace=None):
+    dtype, full, iota, left, right, one, back = widthConstants(width)
+    rounds = full if rounds is None else checkRounds(rounds, full)
+    for start in range(0, len(states), BATCH_TILE):
+        tile  = states[start:start + BATCH_TILE]
+        steps = None if trace is None else trace[start:start + BATCH_TILE]
+        lanes = np.ascontiguousarray(tile.T).reshape(5, 5, -1)
+        for trace_round, round_num in enumerate(range(full - rounds, full)):
+            # theta_step:
+            columns = np.bitwise_xor.reduce(lanes, 0)
+            lanes  ^= columns[THETA_REORDER[0], ] ^ (columns[THETA_REORDER[1], ] << one | columns[THETA_REORDER[1], ] >> back)
+            if steps is not None:
+                steps[:, trace_round, 0] = lanes.reshape(25, -1).T
+
+            # rho_step:
+            lanes = lanes << left | lanes >> right
+            if steps is not None:
+                steps[:, trace_round, 1] = lanes.reshape(25, -1).T
+
+            # pi_step:
+            lanes = lanes[PI_ROW_REORDER_YX, PI_COLUMN_REORDER_YX]
+            if steps is not None:
+                steps[:, trace_round, 2] = lanes.reshape(25, -1).T
+
+            # chi_step:
+            lanes ^= ~lanes[:, CHI_REORDER[0]] & lanes[:, CHI_REORDER[1]]
+            if steps is not None:
+                steps[:, trace_round, 3] = lanes.reshape(25, -1).T
+
+            # iota_step:
+            lanes[0, 0] ^= iota[round_num]
+            if steps is not None:
+                steps[:, trace_round, 4] = lanes.reshape(25, -1).T
+
+        tile[:] = lanes.reshape(25, -1).T
+    return states
+
+
+#Keccak-f[1600] (Keccak-p[1600, rounds]) applied to every row of an (N, 25) uint64 array at once
+def KeccakF1600Batch(states, rounds=ROUNDS, trace=None):
+    return KeccakPBatch(states, 64, rounds, trace)
+
+
+#=== Inverse permutation ===
+#Pi Step inverse: lane [y, x] goes back to where the forward Pi Step took it from
+PI_INVERSE_YX = np.zeros((2, 5, 5), dtype=np.intp)
+PI_INVERSE_YX[:, PI_ROW_REORDER_YX, PI_COLUMN_REORDER_YX] = np.indices((5, 5))
+
+#Chi Step inverse on the rows of 5 lanes: a[x] = b[x] ^ ~b[x+1] & (b[x+2] ^ ~b[x+3] & b[x+4])
+CHI_INVERSE_REORDER = ((1, 2, 3, 4, 0), (2, 3, 4, 0, 1), (3, 4, 0, 1, 2), (4, 0, 1, 2, 3))
+
+
+#inverse of the column parity map of the Theta Step C'[x] = C[x] ^ C[x-1] ^ rot(C[x+1], 1) over GF(2)
+#the (5w, 5w) bit matrix (bit x * w + z) is inverted once and stored as lookup tables of the contribution
+#of every byte of the parities after theta: (5w / 8, 256, 5) lanes
+@lru_cache(maxsize=None)
+def thetaInverse(width):
+    size   = 5 * width
+    bit    = lambda x, z: (x % 5) * width + z % width
+    matrix = np.zeros((size, 2 * size), dtype=bool)
+    for x in range(5):
+        for z in range(width):
+            row = bit(x, z)
+            for column in (bit(x, z), bit(x - 1, z), bit(x + 1, z - 1)):
+                matrix[row, column] ^= True
+            matrix[row, size + row] = True
+
+    # === Gauss-Jordan elimination ===
+    for column in range(size):
+        pivot = column + np.flatnonzero(matrix[column:, column])[0]
+        matrix[[column, pivot]] = matrix[[pivot, column]]
+        rows = np.flatnonzero(matrix[:, column])
+        rows = rows[rows != column]
+        matrix[rows] ^= matrix[column]
+    inverse = matrix[:, size:].astype(np.int64)
+
+    values = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").astype(np.int64)
+    tables = np.empty((size // 8, 256, 5), dtype=LANE_TYPES[width])
+    for byte in range(size // 8):
+        bits = (values @ inverse[:, 8*byte:8*byte + 8].T) & 1
+        tables[byte] = np.packbits(bits.astype(np.uint8), axis=1, bitorder="little").view(LANE_TYPES[width])
+    return tables
+
+
+#inverse of KeccakPBatch (same arguments), the steps of every round are undone in reverse order
+def KeccakPInverseBatch(states, width=64, rounds=None):
+    dtype, full, iota, left, right, one, back = widthConstants(width)
+    tables  = thetaInverse(width)
+    rounds  = full if rounds is None else checkRounds(rounds, full)
+    for start in range(0, len(states), BATCH_TILE):
+        tile  = states[start:start + BATCH_TILE]
+        lanes = np.ascontiguousarray(tile.T).reshape(5, 5, -1)
+        for round_num in reversed(range(full - rounds, full)):
+            # iota_step:
+            lanes[0, 0] ^= iota[round_num]
+
+            # chi_step:
+            b     = lanes
+            lanes = b ^ (~b[:, CHI_INVERSE_REORDER[0]] & (b[:, CHI_INVERSE_REORDER[1]] ^ (~b[:, CHI_INVERSE_REORDER[2]] & b[:, CHI_INVERSE_REORDER[3]])))
+
+            # pi_step:
+            lanes = lanes[PI_INVERSE_YX[0], PI_INVERSE_YX[1]]
+
+            # rho_step:
+            lanes = lanes >> left | lanes << right
+
+            # theta_step:
+            #the parities before theta are recovered from the parities after it, then theta is applied again
+            parity  = np.ascontiguousarray(np.bitwise_xor.reduce(lanes, 0).T).view(np.uint8)
+            columns = tables[0][parity[:, 0]]
+            for byte in range(1, len(tables)):
+                columns ^= tables[byte][parity[:, byte]]
+            columns = columns.T
+            lanes  ^= columns[THETA_REORDER[0], ] ^ (columns[THETA_REORDER[1], ] << one | columns[THETA_REORDER[1], ] >> back)
+
+        tile[:] = lanes.reshape(25, -1).T
+    return states
+
+
+#inverse of KeccakF1600 (Keccak-p[1600, rounds]) for a single state, returns a new bytearray
+def KeccakF1600Inverse(state, rounds=ROUNDS):
+    lanes = np.frombuffer(bytes(state), dtype=np.uint64).copy().reshape(1, KECCAK_LANES)
+    return bytearray(KeccakPInverseBatch(lanes, 64, rounds).tobytes())
+
+
+#single state permutations by backend name
+PERMUTATIONS = {"scalar": KeccakF1600Fast, "numpy": KeccakF1600}
+
+
+#sponge with any of the single state permutations (KeccakF1600 or KeccakF1600Fast)
+#returns the output and a copy of the state after absorbing the input (before padding)
+def KeccakState(rate, capacity, inputBytes, delimitedSuffix, outputByteLen, permutation=KeccakF1600Fast):
+    state = bytearray([0 for i in range(200)])
+    rateInBytes = rate//8
+    blockSize = 0
+    if (((rate + capacity) != 1600) or ((rate % 8) != 0)):
+        return
+    inputOffset = 0
+
+    # === Absorb all the input blocks ===
+    while(inputOffset < len(inputBytes)):
+        blockSize = min(len(inputBytes)-inputOffset, rateInBytes)
+        for i in range(blockSize):
+            state[i] = state[i] ^ inputBytes[i+inputOffset]
+        inputOffset = inputOffset + blockSize
+        if (blockSize == rateInBytes):
+            state = permutation(state)
+            blockSize = 0
+
+    absorbed = bytearray(state)
+
+    # === Do the padding and switch to the squeezing phase ===
+    state[blockSize] = state[blockSize] ^ delimitedSuffix
+    if (((delimitedSuffix & 0x80) != 0) and (blockSize == (rateInBytes-1))):
+        state = permutation(state)
+    state[rateInBytes-1] = state[rateInBytes-1] ^ 0x80
+    state = permutation(state)
+
+    # === Squeeze out all the output blocks ===
+    outputBytes = bytearray(outputByteLen)
+    outputOffset = 0
+    while(outputOffset < outputByteLen):
+        blockSize = min(outputByteLen-outputOffset, rateInBytes)
+        outputBytes[outputOffset:outputOffset+blockSize] = state[:blockSize]
+        outputOffset = outputOffset + blockSize
+        if (outputOffset < outputByteLen):
+            state = permutation(state)
+    return outputBytes, absorbed
+
+
+#Keccak of a list of equal length messages, every phase is done for the whole batch by KeccakPBatch
+#returns (N, outputByteLen) uint8 array of outputs and (N, 25 * width / 8) uint8 array of the states after absorbing the input (before padding)
+#width selects the permutation Keccak-f[25 * width] (rate + capacity has to match it)
+def KeccakBatch(rate, capacity, inputs, delimitedSuffix, outputByteLen, rounds=None, width=64):
+    if (((rate + capacity) != 25 * width) or ((rate % 8) != 0)):
+        return
+    count       = len(inputs)
+    length      = len(inputs[0]) if count else 0
+    messages    = np.frombuffer(b"".join(inputs), dtype=np.uint8).reshape(count, length)
+    states      = np.zeros((count, 25 * width // 8), dtype=np.uint8)
+    lanes       = states.view(widthConstants(width)[0])
+    rateInBytes = rate//8
+    blockSize   = 0
+    inputOffset = 0
+
+    # === Absorb all the input blocks ===
+    while(inputOffset < length):
+        blockSize = min(length-inputOffset, rateInBytes)
+        states[:, :blockSize] ^= messages[:, inputOffset:inputOffset+blockSize]
+        inputOffset = inputOffset + blockSize
+        if (blockSize == rateInBytes):
+            KeccakPBatch(lanes, width, rounds)
+            blockSize = 0
+
+    absorbed = states.copy()
+
+    # === Do the padding and switch to the squeezing phase ===
+    states[:, blockSize] ^= delimitedSuffix
+    if (((delimitedSuffix & 0x80) != 0) and (blockSize == (rateInBytes-1))):
+        KeccakPBatch(lanes, width, rounds)
+    states[:, rateInBytes-1] ^= 0x80
+    KeccakPBatch(lanes, width, rounds)
+
+    # === Squeeze out all the output blocks ===
+    outputs = np.empty((count, outputByteLen), dtype=np.uint8)
+    outputOffset = 0
+    while(outputOffset < outputByteLen):
+        blockSize = min(outputByteLen-outputOffset, rateInBytes)
+        outputs[:, outputOffset:outputOffset+blockSize] = states[:, :blockSize]
+        outputOffset = outputOffset + blockSize
+        if (outputOffset < outputByteLen):
+            KeccakPBatch(lanes, width, rounds)
+    return outputs, absorbed
+
+
+#Standard instances which hashlib computes natively: (rate, capacity, delimitedSuffix) -> hashlib name
+HASHLIB_INSTANCES = {
+    (1152, 448,  0x06): "sha3_224",
+    (1088, 512,  0x06): "sha3_256",
+    (832,  768,  0x06): "sha3_384",
+    (576,  1024, 0x06): "sha3_512",
+    (1344, 256,  0x1F): "shake_128",
+    (1088, 512,  0x1F): "shake_256",
+}
+
+BACKENDS  = ("hashlib", "batch", "scalar", "numpy")
+BATCH_MIN = 16      #smallest number of equal length messages worth hashing with the batch backend
+
+
+def hashlibInstance(rate, capacity, delimitedSuffix, outputByteLen):
+    name = HASHLIB_INSTANCES.get((rate, capacity, delimitedSuffix))
+    if name is None or (name.startswith("sha3") and outputByteLen > capacity//16):    #fixed length sha3 output is only truncatable
+        return None
+    return name
+
+
+#fastest correct backend for hashing `count` messages (of equal length when `equal` is set)
+def selectBackend(rate, capacity, delimitedSuffix, outputByteLen, count=1, equal=True):
+    if hashlibInstance(rate, capacity, delimitedSuffix, outputByteLen) is not None:
+        return "hashlib"
+    if count >= BATCH_MIN and equal:
+        return "batch"
+    return "scalar"
+
+
+def Keccak(rate, capacity, inputBytes, delimitedSuffix, outputByteLen, backend=None):
+    if (((rate + capacity) != 1600) or ((rate % 8) != 0)):
+        return
+    if backend is None:
+        backend = selectBackend(rate, capacity, delimitedSuffix, outputByteLen)
+
+    if backend == "hashlib":
+        name = hashlibInstance(rate, capacity, delimitedSuffix, outputByteLen)
+        if name is None:
+            raise ValueError(f"no hashlib instance with rate {rate}, capacity {capacity} and suffix 0x{delimitedSuffix:02x}")
+        if name.startswith("shake"):
+            return bytearray(hashlib.new(name, inputBytes).digest(outputByteLen))
+        return bytearray(hashlib.new(name, inputBytes).digest()[:outputByteLen])
+    if backend == "batch":
+        return bytearray(KeccakBatch(rate, capacity, [inputBytes], delimitedSuffix, outputByteLen)[0][0].tobytes())
+    if backend in PERMUTATIONS:
+        return KeccakState(rate, capacity, inputBytes, delimitedSuffix, outputByteLen, PERMUTATIONS[backend])[0]
+    raise ValueError(f"unknown backend '{backend}', available: {', '.join(BACKENDS)}")
+
+
+#list of outputs of many messages
+def KeccakMany(rate, capacity, inputs, delimitedSuffix, outputByteLen, backend=None):
+    equal = len({len(inputBytes) for inputBytes in inputs}) <= 1
+    if backend is None:
+        backend = selectBackend(rate, capacity, delimitedSuffix, outputByteLen, len(inputs), equal)
+    if backend == "batch" and equal:
+        outputs = KeccakBatch(rate, capacity, inputs, delimitedSuffix, outputByteLen)[0]
+        return [bytearray(output.tobytes()) for output in outputs]
+    return [Keccak(rate, capacity, inputBytes, delimitedSuffix, outputByteLen, backend) for inputBytes in inputs]
+
+
+#fastest single state permutation, returns a new bytearray like KeccakF1600
+def permute(state, rounds=ROUNDS):
+    return KeccakF1600Fast(bytearray(state), rounds)
+
+
+#hashlib style incremental sponge (update/digest/hexdigest/copy) with any rate and capacity
+#input is absorbed by whole rate blocks straight from the caller's buffer, only the last partial block is kept
+#standard instances are delegated to hashlib
+class KeccakSponge:
+    def __init__(self, rate, capacity, delimitedSuffix, outputByteLen, data=b"", backend=None):
+        if (((rate + capacity) != 1600) or ((rate % 8) != 0)):
+            raise ValueError(f"invalid rate {rate} and capacity {capacity}")
+        if backend is None:
+            backend = selectBackend(rate, capacity, delimitedSuffix, outputByteLen)
+            backend = "hashlib" if backend == "hashlib" else "scalar"
+        if backend not in ("hashlib", *PERMUTATIONS):
+            raise ValueError(f"unknown sponge backend '{backend}', available: hashlib, {', '.join(PERMUTATIONS)}")
+
+        self.rate            = rate
+        self.capacity        = capacity
+        self.delimitedSuffix = delimitedSuffix
+        self.digest_size     = outputByteLen
+        self.block_size      = rate//8
+        self.backend         = backend
+        self.permutation     = PERMUTATIONS.get(backend)
+        self.hashlib         = hashlib.new(hashlibInstance(rate, capacity, delimitedSuffix, outputByteLen)) if backend == "hashlib" else None
+        self.state           = bytearray(KECCAK_BYTES)
+        self.pending         = bytearray()      #last incomplete block
+        self.absorbed        = 0                #number of absorbed bytes (including the pending ones)
+        if data:
+            self.update(data)
+
+    @property
+    def name(self):
+        return f"keccak[r={self.rate},c={self.capacity}]"
+
+    #one rate block xored into the state as a single (rate bits wide) word
+    def absorbBlock(self, block):
+        rateInBytes = self.block_size
+        lanes = int.from_bytes(self.state[:rateInBytes], "little") ^ int.from_bytes(block, "little")
+        self.state[:rateInBytes] = lanes.to_bytes(rateInBytes, "little")
+        self.state = self.permutation(self.state)
+
+    #any bytes-like object: bytes, bytearray, memoryview, mmap, numpy array
+    def update(self, data):
+        if self.hashlib is not None:
+            self.hashlib.update(data)
+            return
+        data        = memoryview(data).cast("B")
+        rateInBytes = self.block_size
+        offset      = 0
+        self.absorbed += len(data)
+
+        if self.pending:
+            offset = min(rateInBytes - len(self.pending), len(data))
+            self.pending += data[:offset]
+            if len(self.pending) < rateInBytes:
+                return
+            self.absorbBlock(self.pending)
+            self.pending = bytearray()
+
+        while len(data) - offset >= rateInBytes:
+            self.absorbBlock(data[offset:offset + rateInBytes])
+            offset += rateInBytes
+        self.pending += data[offset:]
+
+    #reads the file by chunks, memory use does not depend on the file size
+    def updateFile(self, file, chunkSize=1 << 20):
+        chunkSize = max(chunkSize // self.block_size, 1) * self.block_size     #whole blocks, nothing has to be buffered
+        buffer    = bytearray(chunkSize)
+        view      = memoryview(buffer)
+        while True:
+            count = file.readinto(buffer)
+            if not count:
+                break
+            self.update(view[:count])
+        return self
+
+    #(absorbed length, state) at a block boundary, a new sponge can continue from it with fromSnapshot
+    def snapshot(self):
+        if self.hashlib is not None:
+            raise ValueError("hashlib backend has no accessible state, use copy()")
+        if self.pending:
+            raise ValueError("snapshot is only possible at a block boundary")
+        return self.absorbed, bytes(self.state)
+
+    @classmethod
+    def fromSnapshot(cls, rate, capacity, delimitedSuffix, outputByteLen, snapshot, backend="scalar"):
+        sponge = cls(rate, capacity, delimitedSuffix, outputByteLen, backend=backend)
+        sponge.absorbed, state = snapshot
+        sponge.state = bytearray(state)
+        return sponge
+
+    #state after absorbing the input so far, before padding
+    def absorbedState(self):
+        if self.hashlib is not None:
+            raise ValueError("hashlib backend has no accessible state")
+        state = bytearray(self.state)
+        state[:len(self.pending)] = (int.from_bytes(state[:len(self.pending)], "little") ^ int.from_bytes(self.pending, "little")).to_bytes(len(self.pending), "little")
+        return state
+
+    def copy(self):
+        other = KeccakSponge.__new__(KeccakSponge)
+        other.__dict__.update(self.__dict__)
+        other.state   = bytearray(self.state)
+        other.pending = bytearray(self.pending)
+        other.hashlib = self.hashlib.copy() if self.hashlib is not None else None
+        return other
+
+    def digest(self):
+        if self.hashlib is not None:
+            if self.hashlib.name.startswith("shake"):
+                return self.hashlib.digest(self.digest_size)
+            return self.hashlib.digest()[:self.digest_size]
+        return self.xof().read(self.digest_size)
+
+    #extendable output of the input absorbed so far, the sponge itself can still be updated
+    def xof(self):
+        return KeccakXOF(self)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+#squeezing phase of a KeccakSponge (SHAKE like reader), output blocks are produced only when they are read
+class KeccakXOF:
+    def __init__(self, sponge):
+        self.rateInBytes = sponge.block_size
+        self.offset      = 0        #already read bytes of the current block
+        if sponge.hashlib is not None:
+            if not sponge.hashlib.name.startswith("shake"):
+                raise ValueError(f"{sponge.hashlib.name} has a fixed output length, use digest()")
+            #hashlib can not continue squeezing, its output is recomputed with doubling length (linear in total)
+            self.hashlib  = sponge.hashlib.copy()
+            self.output   = b""
+            self.position = 0
+            return
+
+        self.hashlib     = None
+        self.permutation = sponge.permutation
+        state            = sponge.absorbedState()
+        blockSize        = len(sponge.pending)
+
+        # === Do the padding and switch to the squeezing phase ===
+        state[blockSize] = state[blockSize] ^ sponge.delimitedSuffix
+        if (((sponge.delimitedSuffix & 0x80) != 0) and (blockSize == (self.rateInBytes-1))):
+            state = self.permutation(state)
+        state[self.rateInBytes-1] = state[self.rateInBytes-1] ^ 0x80
+        self.state = self.permutation(state)
+
+    def readHashlib(self, length):
+        end = self.position + length
+        if len(self.output) < end:
+            self.output = self.hashlib.digest(max(end, 2 * len(self.output)))
+        result        = self.output[self.position:end]
+        self.position = end
+        self.offset   = end % self.rateInBytes
+        return result
+
+    #output as rate sized blocks, produced lazily (the first one is shorter when part of it was already read)
+    def blocks(self):
+        while True:
+            if self.hashlib is not None:
+                yield self.readHashlib(self.rateInBytes - self.offset)
+                continue
+            block       = bytes(self.state[self.offset:self.rateInBytes])
+            self.state  = self.permutation(self.state)
+            self.offset = 0
+            yield block
+
+    #fills the whole (writable) buffer with the next output bytes, returns the buffer
+    def readinto(self, buffer):
+        out    = memoryview(buffer).cast("B")
+        length = len(out)
+        if self.hashlib is not None:
+            out[:] = self.readHashlib(length)
+            return buffer
+
+        # === Squeeze out all the output blocks ===
+        outputOffset = 0
+        while(outputOffset < length):
+            blockSize = min(length-outputOffset, self.rateInBytes-self.offset)
+            out[outputOffset:outputOffset+blockSize] = self.state[self.offset:self.offset+blockSize]
+            outputOffset = outputOffset + blockSize
+            self.offset  = self.offset + blockSize
+            if (self.offset == self.rateInBytes):
+                self.state  = self.permutation(self.state)
+                self.offset = 0
+        return buffer
+
+    def read(self, length):
+        return bytes(self.readinto(bytearray(length)))
+
+
+#LRU cache of sponge snapshots keyed by block aligned message prefixes (their length and blake2b digest)
+#hashing a message continues from the longest cached prefix, so appending to an already hashed message costs only the new blocks
+#the prefixes of a message are digested in one pass and only at the lengths that are stored,
+#messages longer than maxBlocks blocks are hashed without the cache
+class PrefixCache:
+    def __init__(self, rate, capacity, delimitedSuffix, outputByteLen, size=1024, backend="scalar", maxBlocks=64):
+        self.parameters = (rate, capacity, delimitedSuffix, outputByteLen)
+        self.backend    = backend
+        self.size       = size
+        self.maxBlocks  = maxBlocks
+        self.snapshots  = OrderedDict()     #(prefix length, digest) -> snapshot
+        self.lengths    = Counter()         #prefix length -> number of stored snapshots
+        self.hits       = 0
+        self.misses     = 0
+
+    def store(self, key, sponge):
+        if key not in self.snapshots:
+            self.lengths[key[0]] += 1
+        self.snapshots[key] = sponge.snapshot()
+        self.snapshots.move_to_end(key)
+        while len(self.snapshots) > self.size:
+            (length, digest), snapshot = self.snapshots.popitem(last=False)
+            self.lengths[length] -= 1
+            if not self.lengths[length]:
+                del self.lengths[length]
+
+    #sponge which absorbed the whole message, the snapshot at its last block boundary is cached
+    def sponge(self, message):
+        message     = memoryview(message).cast("B")
+        rateInBytes = self.parameters[0]//8
+        boundary    = len(message) // rateInBytes * rateInBytes
+        if boundary > self.maxBlocks * rateInBytes:
+            return KeccakSponge(*self.parameters, data=message, backend=self.backend)
+
+        #keys of the stored prefix lengths of this message and of the whole block aligned part
+        digest, position, keys = hashlib.blake2b(), 0, []
+        for length in sorted(length for length in self.lengths if length <= boundary) + [boundary]:
+            digest.update(message[position:length])
+            position = length
+            keys.append((length, digest.digest()))
+
+        sponge = None
+        for key in reversed(keys):
+            snapshot = self.snapshots.get(key)
+            if snapshot is not None:
+                self.snapshots.move_to_end(key)
+                sponge = KeccakSponge.fromSnapshot(*self.parameters, snapshot, self.backend)
+                self.hits += 1
+                break
+        else:
+            sponge = KeccakSponge(*self.parameters, backend=self.backend)
+            self.misses += 1
+
+        sponge.update(message[sponge.absorbed:boundary])
+        if boundary:
+            self.store(keys[-1], sponge)
+        sponge.update(message[boundary:])
+        return sponge
+
+    #(hash, state after absorbing the message)
+    def hash(self, message):
+        sponge = self.sponge(message)
+        return sponge.digest(), sponge.absorbedState()
+
+
+#prefix cache of the CUSTOM_KECCAK instance with the given capacity and hash length
+@lru_cache(maxsize=None)
+def customPrefixCache(capacity, hash_len):
+    return PrefixCache(1600 - capacity, capacity, 0x06, hash_len//8)
+
+
+def CUSTOM_KECCAK(inputBytes, capacity, hash_len):
+    return Keccak(1600 - capacity, capacity, inputBytes, 0x06, hash_len//8)
+
+
+#width selects Keccak-f[25 * width], 64 is the standard Keccak-f[1600]
+def CUSTOM_KECCAK_BATCH(inputs, capacity, hash_len, rounds=None, width=64):
+    return KeccakBatch(25 * width - capacity, capacity, inputs, 0x06, hash_len//8, rounds, width)
+
+
+#(hash, state after absorbing the message) of a single message with Keccak-f[25 * width]
+#the standard width goes through the prefix cache (already hashed prefixes are not absorbed again)
+def customKeccakState(inputBytes, capacity, hash_len, width=64):
+    if width == 64:
+        hash, a_state = customPrefixCache(capacity, hash_len).hash(inputBytes)
+        return bytearray(hash), a_state
+    hashes, a_states = CUSTOM_KECCAK_BATCH([inputBytes], capacity, hash_len, width=width)
+    return bytearray(hashes[0].tobytes()), bytearray(a_states[0].tobytes())
+
+
+#permutations/sec of the single state permutations and hashes/sec of the batched sponge by batch size
+if __name__ == "__main__":
+    from os import urandom
+
+    state = bytearray(urandom(KECCAK_BYTES))
+    for name, permutation, count in (("KeccakF1600", KeccakF1600, 500), ("KeccakF1600Fast", KeccakF1600Fast, 5000)):
+        start = perf_counter()
+        for i in range(count):
+            state = permutation(state)
+        print(f"{name:>15}: {count / (perf_counter() - start):10.0f} permutations/s")
+
+    CAPACITY = 16
+    messages = [urandom((1600 - CAPACITY)//8) for i in range(4096)]
+
+    start = perf_counter()
+    for message in messages[:256]:
+        CUSTOM_KECCAK(message, CAPACITY, 1600 - CAPACITY)
+    print(f"{'single':>6}: {256 / (perf_counter() - start):10.0f} hashes/s")
+
+    for batch in (1, 16, 64, 256, 1024, 4096):
+        start = perf_counter()
+        for i in range(0, len(messages), batch):
+            CUSTOM_KECCAK_BATCH(messages[i:i + batch], CAPACITY, 1600 - CAPACITY)
+        print(f"{batch:>6}: {len(messages) / (perf_counter() - start):10.0f} hashes/s")
@@ -0,0 +1,90 @@
+import sys
+import threading
+from multiprocessing.managers import BaseManager
+from os import urandom
+from time import sleep
+
+from collision import Coordinator, CollisionTable, DiskCollisionTable, capacityKeys, extendCollision, forwardStates, message
+
+
+WIDTH = 64          #lane width of Keccak-f[25 * WIDTH]: 8, 16, 32 or 64 (Keccak-f[1600])
+CAPACITY = 16
+RATE = 25*WIDTH - CAPACITY
+HASH_LEN = RATE
+PORT = 50790
+AUTHKEY = b"pv079-task3"
+
+
+class SearchManager(BaseManager):
+    pass
+
+
+#hashes a handed out range and returns only the packed capacities
+def hash_range(seed, start, count):
+    a_states = forwardStates(seed, start, count, CAPACITY, WIDTH)
+    return capacityKeys(a_states, CAPACITY).tobytes()
+
+
+#serves the coordinator on host:port until some worker finds a collision
+def coordinator(port, directory=None):
+    if directory is not None:
+        table = DiskCollisionTable(directory, CAPACITY)
+        search = Coordinator(table, table.seed, table.next)
+    else:
+        search = Coordinator(CollisionTable(), urandom(16))
+
+    SearchManager.register("search", callable=lambda: search)
+    server = SearchManager(address=("127.0.0.1", port), authkey=AUTHKEY).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"Capacity: {CAPACITY}")
+    print(f"Coordinator listening on 127.0.0.1:{port}")
+    try:
+        while not search.found.wait(5):
+            print(search.stats())   #"progress"
+    except KeyboardInterrupt:
+        if directory is not None:
+            with search.lock:
+                table.flush()
+        print(f"Stopped, {search.stats()}")
+        sys.exit(1)
+
+    print(search.stats())
+    print("Done")
+    sleep(1)    #let the workers collect the result
+    return message(search.seed, search.match[0], RATE//8), message(search.seed, search.match[1], RATE//8)
+
+
+#hashes ranges from the coordinator until it has a collision, workers can join and leave at any time
+def worker(host, port):
+    SearchManager.register("search")
+    manager = SearchManager(address=(host, port), authkey=AUTHKEY)
+    manager.connect()
+    search = manager.search()
+
+    hashed = 0
+    while True:
+        task = search.task()
+        if task is None:
+            break
+        if search.submit(task[1], hash_range(*task)) is not None:
+            break
+        hashed += task[2]
+    match = search.result()
+    print(f"Hashed {hashed} messages, collision of messages {match[0]} and {match[1]}")
+
+
+#usage: task3-dist.py coordinator [port] [directory]
+#       task3-dist.py worker [host] [port]
+if __name__=='__main__':
+    mode = sys.argv[1] if len(sys.argv) > 1 else "coordinator"
+    if mode == "coordinator":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+        extendCollision(*coordinator(port, sys.argv[3] if len(sys.argv) > 3 else None), CAPACITY, HASH_LEN, WIDTH)
+    elif mode == "worker":
+        host = sys.argv[2] if len(sys.argv) > 2 else "127.0.0.1"
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else PORT
+        worker(host, port)
+    else:
+        print("usage: task3-dist.py coordinator [port] [directory] | worker [host] [port]")
+        sys.exit(1)
@@ -0,0 +1,54 @@
+from multiprocessing import Pool
+from os import urandom
+
+import numpy as np
+
+from collision import DistinguishedPoints, extendCollision, locate, message, trails
+
+
+WIDTH = 64          #lane width of Keccak-f[25 * WIDTH]: 8, 16, 32 or 64 (Keccak-f[1600])
+CAPACITY = 16
+RATE = 25*WIDTH - CAPACITY
+HASH_LEN = RATE
+DP_BITS = CAPACITY // 4     #trails end in capacities with DP_BITS low zero bits
+TRAILS = 256                #trails walked in lockstep by one worker (batch size of the permutation)
+STEPS = 16 << DP_BITS       #steps per task, trails unfinished at the end of a task are thrown away
+
+
+#walks trails from starts drawn from worker_seed and returns only the distinguished points they reached
+def multiprocessing_func(task):
+    seed, worker_seed = task
+    rng = np.random.default_rng(int.from_bytes(worker_seed, "little"))
+    return list(trails(seed, rng, TRAILS, STEPS, CAPACITY, DP_BITS, WIDTH))
+
+
+#van Oorschot-Wiener parallel collision search, memory depends only on the number of distinguished points
+if __name__=='__main__':
+    NPROC = 12 #Numer of available processors
+    pool = Pool(NPROC)
+
+    points = DistinguishedPoints()
+    seed = urandom(16)
+
+    print(f"Capacity: {CAPACITY}")
+    print(f"Distinguished bits: {DP_BITS}")
+
+    while True:
+        results = pool.map(multiprocessing_func, [(seed, urandom(16)) for i in range(NPROC)])
+        for start, point, length in (trail for result in results for trail in result):
+            stored = points.add(start, point, length)
+            if stored is None:
+                continue
+            keys = locate(seed, stored, (start, length), CAPACITY, WIDTH)
+            if keys is not None:    #different trails merged -> two messages with the same capacity
+                print(len(points))
+                print("Done")
+                ms1 = message(seed, keys[0], RATE//8)
+                ms2 = message(seed, keys[1], RATE//8)
+                break
+        else:
+            print(len(points), points.length)   #"progress"
+            continue
+        break
+
+    extendCollision(ms1, ms2, CAPACITY, HASH_LEN, WIDTH)
@@ -0,0 +1,28 @@
+from os import urandom
+
+from collision import connect, extendCollision, meetInTheMiddle
+from keccak import customKeccakState
+
+
+WIDTH = 64          #lane width of Keccak-f[25 * WIDTH]: 8, 16, 32 or 64 (Keccak-f[1600])
+CAPACITY = 16
+RATE = 25*WIDTH - CAPACITY
+HASH_LEN = RATE
+
+
+#meet in the middle: the capacity of the first message is the target, the second message is built from a forward
+#(absorbed) and a backward (inverse permutation of a state with the target capacity) state with the same capacity
+if __name__=='__main__':
+    ms1 = bytes("\x00" * (RATE//8), "utf-8")
+    target = customKeccakState(ms1, CAPACITY, HASH_LEN, WIDTH)[1][-(CAPACITY//8):]
+
+    print(f"Capacity: {CAPACITY}")
+    print(f"Target capacity: {bytes(target).hex()}")
+
+    seed = urandom(16)
+    forward, backward = meetInTheMiddle(seed, target, CAPACITY, width=WIDTH)
+    ms2 = connect(seed, forward, backward, CAPACITY, target, WIDTH)
+    print(f"Forward message {forward}, backward state {backward}")
+    print("Done")
+
+    extendCollision(ms1, ms2, CAPACITY, HASH_LEN, WIDTH)
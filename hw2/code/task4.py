@@ -1,85 +1,8 @@
-# -*- coding: utf-8 -*-
-# Implementation by Gilles Van Assche, hereby denoted as "the implementer".
-#
-# For more information, feedback or questions, please refer to our website:
-# https://keccak.team/
-#
-# To the extent possible under law, the implementer has waived all copyright
-# and related or neighboring rights to the source code in this file.
-# http://creativecommons.org/publicdomain/zero/1.0/
-
-#Entire Keccak implementation taken from: https://github.com/XKCP/XKCP/blob/master/Standalone/CompactFIPS202/Python/CompactFIPS202_numpy.py
+import sys
 
 import numpy as np
 
-
-KECCAK_BYTES = 200
-KECCAK_LANES = 25
-KECCAK_PLANES_SLICES = 5
-
-THETA_REORDER = ((4, 0, 1, 2, 3), (1, 2, 3, 4, 0))
-
-#Iota Step Round Constants For Keccak-p(1600, 24)
-IOTA_CONSTANTS = np.array([0x0000000000000001,0x0000000000008082, 0x800000000000808A,
-                            0x8000000080008000, 0x000000000000808B, 0x0000000080000001,
-                            0x8000000080008081, 0x8000000000008009, 0x000000000000008A,
-                            0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
-                            0x000000008000808B, 0x800000000000008B, 0x8000000000008089,
-                            0x8000000000008003, 0x8000000000008002, 0x8000000000000080,
-                            0x000000000000800A, 0x800000008000000A, 0x8000000080008081,
-                            0x8000000000008080, 0x0000000080000001, 0x8000000080008008],
-                          dtype=np.uint64)
-
-#Lane Shifts for Rho Step
-RHO_SHIFTS = np.array([[0, 36, 3, 41, 18],
-                       [1, 44, 10, 45, 2],
-                       [62, 6, 43, 15, 61],
-                       [28, 55, 25, 21, 56],
-                       [27, 20, 39, 8, 14]], dtype=np.uint64)
-
-#Lane Re-order Mapping for Chi Step
-CHI_REORDER = ((1, 2, 3, 4, 0), (2, 3, 4, 0, 1))
-
-#Row Re-order Mapping for Pi Step
-PI_ROW_REORDER = np.array([[0, 3, 1, 4, 2],
-                           [1, 4, 2, 0, 3],
-                           [2, 0, 3, 1, 4],
-                           [3, 1, 4, 2, 0],
-                           [4, 2, 0, 3, 1]])
-
-#Column Re-order Mapping for Pi Step
-PI_COLUMN_REORDER = np.array([[0, 0, 0, 0, 0],
-                              [1, 1, 1, 1, 1],
-                              [2, 2, 2, 2, 2],
-                              [3, 3, 3, 3, 3],
-                              [4, 4, 4, 4, 4]])
-
-
-def KeccakF1600(state):
-    state = np.copy(np.frombuffer(state, dtype=np.uint64, count=25).reshape([5, 5], order='F'))
-    for round_num in range(24):
-        # theta_step:
-        # Exclusive-or each slice-lane by state based permutation value
-        array_shift = state << 1 | state >> 63
-        state ^= np.bitwise_xor.reduce(state[THETA_REORDER[0], ], 1, keepdims=True) ^ np.bitwise_xor.reduce(array_shift[THETA_REORDER[1], ], 1, keepdims=True)
-
-        # rho_step:
-        # Left Rotate each lane by pre-calculated value
-        state = state << RHO_SHIFTS | state >> np.uint64(64 - RHO_SHIFTS)
-
-        # pi_step:
-        # Shuffle lanes to pre-calculated positions
-        state = state[PI_ROW_REORDER, PI_COLUMN_REORDER]
-
-        # chi_step:
-        # Exclusive-or each individual lane based on and/invert permutation
-        state ^= ~state[CHI_REORDER[0], ] & state[CHI_REORDER[1], ]
-
-        # iota_step:
-        # Exclusive-or first lane of state with round constant
-        state[0, 0] ^= IOTA_CONSTANTS[round_num]
-
-    return bytearray(state.tobytes(order='F'))
+from avalanche import average, counts, statistics
 
 
 def printHex(byte_data):
@@ -87,38 +10,42 @@ def printHex(byte_data):
         print(f"{byte:02x}", end="")
     print("")
 
-#taken from https://www.geeksforgeeks.org/number-of-mismatching-bits-in-the-binary-representation-of-two-integers/
-def bitDif(a, b):
-    cnt = 0
-    for i in range(0, 1600):
-        if ((( a >>  i) & 1) != (( b >>  i) & 1)):
-            cnt += 1
-    return cnt
+
+#changed output bits -> number of flips, in bins of the given width
+def printHistogram(histogram, width=16):
+    for low in range(0, len(histogram), width):
+        count = int(histogram[low:low + width].sum())
+        if count:
+            print(f"{low:4}-{low + width - 1:4}: {count}")
 
 
-msg = bytearray("\x00" * 199, "utf-8") + (492875 % 256).to_bytes(1, 'big')
-printHex(msg)
-min = 1600
-max = 0
-avg = 0
+WIDTH = 64          #lane width of Keccak-f[25 * WIDTH]: 8, 16, 32 or 64 (Keccak-f[1600])
+STATE_BITS = 25*WIDTH
 
-for i in range(0, 1600):
-    old_msg = msg.copy()
-    old_msg[i // 8] = old_msg[i // 8] ^ (1 << i % 8)
+#usage: task4.py [messages] [processes] -> also average the dependency matrix over random messages
+if __name__=='__main__':
+    msg = bytearray("\x00" * (STATE_BITS//8 - 1), "utf-8") + (492875 % 256).to_bytes(1, 'big')
+    printHex(msg)
 
-    old_hash = int.from_bytes(KeccakF1600(old_msg), byteorder="big")
-    hash     = int.from_bytes(KeccakF1600(msg), byteorder="big")
+    #all single bit flips of msg are permuted as one batch
+    result = statistics(counts(msg, width=WIDTH), STATE_BITS)
 
-    result = bitDif(old_hash, hash)
-    avg += result
-    if result < min:
-        min = result
-    if result > max:
-        max = result
+    printHex(msg)
 
-printHex(msg)
+    print(f"Max: {result['max']}")
+    print(f"Min: {result['min']}")
+    print(f"Avg: {result['avg']}")
 
-print(f"Max: {max}")
-print(f"Min: {min}")
-print(f"Avg: {avg / 1600}")
+    if len(sys.argv) > 1:
+        MESSAGES  = int(sys.argv[1])
+        NPROC     = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+        dependency, result = average(MESSAGES, NPROC, width=WIDTH)
 
+        print("")
+        print(f"Random messages: {MESSAGES}")
+        print(f"Max: {result['max']}")
+        print(f"Min: {result['min']}")
+        print(f"Avg: {result['avg']}")
+        print(f"Dependency probability min/max: {dependency.min():.4f}/{dependency.max():.4f}")
+        print(f"Input bits with an output bit never/always flipped: {np.count_nonzero((dependency == 0).any(axis=1))}/{np.count_nonzero((dependency == 1).any(axis=1))}")
+        printHistogram(result["histogram"])